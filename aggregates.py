@@ -0,0 +1,401 @@
+import heapq
+import math
+
+import numpy as np
+import pandas as pd
+
+from timeseries import DAY, PERIODS, FitnessTimeSeries, period_start
+
+SMALL_BATCH = 32  # Changes of up to this many records skip the vectorized grouping
+
+
+class Metric:
+    """A statistic the AggregateEngine keeps up to date as records come and go.
+
+    Subclasses override add/remove/reset, which receive records as a dict of
+    column name -> numpy array (see FitnessRecordStore.records), and value().
+    """
+
+    def add(self, records):
+        pass
+
+    def remove(self, records):
+        pass
+
+    def reset(self):
+        pass
+
+    def value(self):
+        raise NotImplementedError
+
+
+class _LazyHeap:
+    """Heap with lazy deletion: removals are remembered and skipped on peek.
+
+    Once removed values make up more than half of the heap it is rebuilt
+    without them, so a long run of deletes and edits cannot grow it without
+    bound.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.removed = {}
+        self.stale = 0  # Values in the heap that have been removed
+
+    def push_many(self, values):
+        if not self.heap:
+            self.heap = list(values)
+            heapq.heapify(self.heap)
+        else:
+            for value in values:
+                heapq.heappush(self.heap, value)
+
+    def remove_many(self, values):
+        for value in values:
+            self.removed[value] = self.removed.get(value, 0) + 1
+            self.stale += 1
+        if self.stale * 2 > len(self.heap):
+            self._rebuild()
+
+    def _rebuild(self):
+        removed = self.removed
+        kept = []
+        for value in self.heap:
+            if removed.get(value):
+                removed[value] -= 1
+            else:
+                kept.append(value)
+        heapq.heapify(kept)
+        self.heap = kept
+        self.removed = {}
+        self.stale = 0
+
+    def peek(self):
+        while self.heap and self.removed.get(self.heap[0]):
+            value = heapq.heappop(self.heap)
+            self.removed[value] -= 1
+            if not self.removed[value]:
+                del self.removed[value]
+            self.stale -= 1
+        return self.heap[0] if self.heap else None
+
+
+class ColumnStats(Metric):
+    """Count, sum, sum of squares, min and max of a numeric column (NaNs skipped).
+
+    Mean and variance come straight from the running sums. Min and max use
+    lazily-pruned heaps, so they stay correct across deletes.
+    """
+
+    def __init__(self, column):
+        self.column = column
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self._low = _LazyHeap()
+        self._high = _LazyHeap()
+
+    def _values(self, records):
+        values = np.asarray(records[self.column], dtype=float)
+        return values[~np.isnan(values)]
+
+    def add(self, records):
+        values = self._values(records)
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_squares += float((values * values).sum())
+        self._low.push_many(values.tolist())
+        self._high.push_many((-values).tolist())
+
+    def remove(self, records):
+        values = self._values(records)
+        self.count -= len(values)
+        self.total -= float(values.sum())
+        self.total_squares -= float((values * values).sum())
+        self._low.remove_many(values.tolist())
+        self._high.remove_many((-values).tolist())
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def variance(self):
+        """Population variance."""
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        return max(0.0, self.total_squares / self.count - mean * mean)
+
+    def std(self):
+        variance = self.variance()
+        return None if variance is None else math.sqrt(variance)
+
+    def minimum(self):
+        return self._low.peek()
+
+    def maximum(self):
+        top = self._high.peek()
+        return None if top is None else -top
+
+    def value(self):
+        return self.mean()
+
+
+class Trend(Metric):
+    """Least-squares slope of a column against entry order (row id), per entry."""
+
+    def __init__(self, column):
+        self.column = column
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.sum_x = 0  # Python ints keep the x sums exact
+        self.sum_xx = 0
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+
+    def _apply(self, records, sign):
+        y = np.asarray(records[self.column], dtype=float)
+        present = ~np.isnan(y)
+        x, y = records['row_id'][present], y[present]
+        self.count += sign * len(y)
+        self.sum_x += sign * int(x.sum())
+        self.sum_xx += sign * int((x.astype(object) ** 2).sum()) if len(x) else 0
+        self.sum_y += sign * float(y.sum())
+        self.sum_xy += sign * float((x * y).sum())
+
+    def add(self, records):
+        self._apply(records, 1)
+
+    def remove(self, records):
+        self._apply(records, -1)
+
+    def value(self):
+        spread = self.count * self.sum_xx - self.sum_x * self.sum_x
+        if self.count < 2 or spread == 0:
+            return None
+        return (self.count * self.sum_xy - self.sum_x * self.sum_y) / spread
+
+
+class RollingStats(Metric):
+    """Mean of a column over the last `window` days, or the last `window` entries.
+
+    Once every live record is dated the window is the `window` calendar
+    days up to the latest date, found by binary search in the time series;
+    until then it is the last `window` entries in insertion order. Either
+    way the value is recomputed on demand from the records in the window
+    only, so its cost does not grow with the log.
+    """
+
+    def __init__(self, store, column, window, timeseries):
+        self.store = store
+        self.column = column
+        self.window = window
+        self.timeseries = timeseries
+
+    def by_date(self):
+        """Whether the window is in days (every entry is dated) rather than entries."""
+        return 0 < len(self.timeseries) == len(self.store)
+
+    def last_values(self):
+        if self.by_date():
+            last = self.timeseries.span()[1]
+            row_ids = self.timeseries.row_ids(last - (self.window - 1) * DAY, last)
+            return self.store.raw(self.column)[self.store.slots(row_ids)]
+        alive = self.store.alive()
+        span = self.window
+        while True:
+            start = max(0, len(alive) - span)
+            slots = start + np.flatnonzero(alive[start:])
+            if len(slots) >= self.window or start == 0:
+                break
+            span *= 2
+        return self.store.raw(self.column)[slots[-self.window:]]
+
+    def value(self):
+        values = self.last_values()
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if len(values) else None
+
+
+class AggregateCube(Metric):
+    """Entry counts and weight/calorie statistics per (Exercise_Split, period) cell.
+
+    The period is the entry's Day column ('weekday') or the day, week, month
+    or year of its date; undated entries are left out of the latter. Each cell keeps
+    running counts, sums and sums of squares like ColumnStats, so a change
+    only updates the cells of the records it touches and breakdowns are read
+    straight from the cells instead of grouping the log.
+    """
+
+    # Per-cell sums, in the order of a cell's array
+    FIELDS = ('entries', 'weight_count', 'weight_sum', 'weight_squares',
+              'calories_count', 'calories_sum', 'calories_squares')
+
+    def __init__(self, period):
+        if period != 'weekday' and period not in PERIODS:
+            raise ValueError(f"Unknown period {period!r}; use 'weekday' or one of {', '.join(PERIODS)}.")
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.cells = {}  # (split, period key) -> float64 array of FIELDS
+        self.version = 0
+        self._frame = None
+        self._frame_version = -1
+
+    def _keys(self, records):
+        """Split labels and period keys of the records that fall in a cell, and which records those are."""
+        splits = np.asarray(records['Exercise_Split'], dtype=object)
+        if self.period == 'weekday':
+            return splits, np.asarray(records['Day'], dtype=object), slice(None)
+        dates = records['Date']
+        dated = ~np.isnat(dates)
+        # Day numbers since 1970-01-01 of the period's first day
+        starts = period_start(dates[dated], self.period).astype('datetime64[D]').astype(np.int64)
+        return splits[dated], starts, dated
+
+    def _apply(self, records, sign):
+        splits, periods, used = self._keys(records)
+        weight = np.asarray(records['Weight (kg)'], dtype=float)[used]
+        calories = np.asarray(records['Diet (Calories)'], dtype=float)[used]
+        weight_known, calories_known = ~np.isnan(weight), ~np.isnan(calories)
+        weight, calories = np.where(weight_known, weight, 0.0), np.where(calories_known, calories, 0.0)
+        sums = np.column_stack((np.ones(len(weight)), weight_known, weight, weight * weight,
+                                calories_known, calories, calories * calories))
+
+        if len(sums) <= SMALL_BATCH:
+            changes = zip(zip(splits.tolist(), periods.tolist()), sums)
+        else:
+            grouped = pd.DataFrame(sums).groupby([splits, periods], sort=False, dropna=False).sum()
+            changes = zip(grouped.index, grouped.to_numpy())
+        for key, change in changes:
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = np.zeros(len(self.FIELDS))
+            cell += sign * change
+            if cell[0] < 0.5:
+                del self.cells[key]
+        self.version += 1
+
+    def add(self, records):
+        self._apply(records, 1)
+
+    def remove(self, records):
+        self._apply(records, -1)
+
+    def cell(self, split, period):
+        """Statistics of one cell as a dict (see frame() for the keys), or None if it is empty.
+
+        `period` is a Day label for the 'weekday' cube, else any date in the period.
+        """
+        if self.period != 'weekday':
+            period = int(period_start(np.array([period], dtype='datetime64[D]'), self.period)
+                         .astype('datetime64[D]').astype(np.int64)[0])
+        if (split, period) not in self.cells:
+            return None
+        return self._stats(np.array([self.cells[(split, period)]])).to_dict('records')[0]
+
+    def _stats(self, sums, index=None):
+        entries, weight_count, weight_sum, weight_squares, calories_count, calories_sum, calories_squares = sums.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight_mean = weight_sum / weight_count
+            calories_mean = calories_sum / calories_count
+            weight_std = np.sqrt(np.maximum(0.0, weight_squares / weight_count - weight_mean ** 2))
+            calories_std = np.sqrt(np.maximum(0.0, calories_squares / calories_count - calories_mean ** 2))
+        return pd.DataFrame({
+            'Entries': np.rint(entries).astype(np.int64),
+            'Weight (kg)': weight_mean,
+            'Weight Std': weight_std,
+            'Diet (Calories)': calories_mean,
+            'Calories Std': calories_std,
+            'Calories Total': calories_sum,
+        }, index=index)
+
+    def frame(self, split=None):
+        """The cells as a DataFrame indexed by (Exercise_Split, period), or by period for one split.
+
+        Columns: Entries, mean Weight (kg) and Diet (Calories), Weight Std,
+        Calories Std and Calories Total (population statistics; NaN without
+        values). Date periods are labelled by their first day. The table is
+        rebuilt from the cells, not the log, and cached until they change.
+        """
+        if self._frame_version != self.version:
+            keys = list(self.cells)
+            splits = [key[0] for key in keys]
+            periods = [key[1] for key in keys]
+            if self.period != 'weekday':
+                periods = pd.DatetimeIndex(np.array(periods, dtype='datetime64[D]').astype('datetime64[s]'))
+            index = pd.MultiIndex.from_arrays([splits, periods], names=['Exercise_Split', 'Day' if self.period == 'weekday' else self.period.capitalize()])
+            sums = np.array([self.cells[key] for key in keys]).reshape(-1, len(self.FIELDS))
+            self._frame = self._stats(sums, index).sort_index()
+            self._frame_version = self.version
+        if split is None:
+            return self._frame
+        if split not in self._frame.index.get_level_values(0):
+            return self._frame.iloc[:0].droplevel(0)
+        return self._frame.xs(split, level=0)
+
+    def value(self):
+        return self.frame()
+
+
+class AggregateEngine:
+    """Dashboard metrics maintained incrementally from the store's mutation events.
+
+    Built-in metrics: weight/calories (ColumnStats), weight_trend (Trend) and
+    7/30-day rolling means (RollingStats; by entries while some are undated).
+    Further metrics can be added with register().
+    Breakdowns by Exercise_Split and period come from cube(), whose
+    AggregateCubes are kept up to date the same way once first asked for.
+    """
+
+    def __init__(self, store, timeseries=None):
+        self.store = store
+        self.timeseries = timeseries if timeseries is not None else FitnessTimeSeries(store)
+        self.metrics = {}
+        self.cubes = {}
+        self.weight = self.register('weight', ColumnStats('Weight (kg)'))
+        self.calories = self.register('calories', ColumnStats('Diet (Calories)'))
+        self.weight_trend = self.register('weight_trend', Trend('Weight (kg)'))
+        for window in (7, 30):
+            self.register(f'weight_{window}', RollingStats(store, 'Weight (kg)', window, self.timeseries))
+            self.register(f'calories_{window}', RollingStats(store, 'Diet (Calories)', window, self.timeseries))
+        store.subscribe(self._on_change)
+
+    def register(self, name, metric):
+        """Add a metric, seeded with the records already in the store."""
+        metric.reset()
+        if len(self.store):
+            metric.add(self.store.records())
+        self.metrics[name] = metric
+        return metric
+
+    def value(self, name):
+        return self.metrics[name].value()
+
+    def cube(self, period):
+        """The AggregateCube for a period ('weekday', 'day', 'week', 'month' or 'year'), built on first use.
+
+        For example, average calories on Legs days per month:
+
+            engine.cube('month').frame('Legs')['Diet (Calories)']
+        """
+        if period not in self.cubes:
+            cube = AggregateCube(period)
+            if len(self.store):
+                cube.add(self.store.records())
+            self.cubes[period] = cube
+        return self.cubes[period]
+
+    def _on_change(self, event, records):
+        for metric in [*self.metrics.values(), *self.cubes.values()]:
+            if event == 'append':
+                metric.add(records)
+            elif event == 'delete':
+                metric.remove(records)
+            else:
+                metric.reset()
@@ -1,6 +1,48 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from db_setup import connect_db, setup_database  
+from credentials import hash_password, needs_rehash, verification_cache, verify_missing_user
+from db_setup import db_cursor, execute, fetch_one, wait_for_database
+from sessions import start_session
+from tasks import TaskScheduler
+
+
+# ---------------- Credentials (no UI; run on a worker) ---------------- #
+
+def authenticate(username, password):
+    """Check the credentials and return the user's id, or None.
+
+    The row is looked up by its unique username alone and the password
+    verified against the stored hash. Plaintext passwords from before
+    hashing, and hashes with outdated parameters, are rehashed in place.
+    """
+    wait_for_database()
+    user = fetch_one("SELECT id, password FROM users WHERE username = %s", (username,))
+    if user is None:
+        verify_missing_user(password)
+        return None
+
+    user_id, stored = user
+    if isinstance(stored, (bytes, bytearray)):
+        stored = stored.decode("utf-8")
+    if not verification_cache.verify(password, stored):
+        return None
+    if needs_rehash(stored):
+        try:
+            execute("UPDATE users SET password = %s WHERE id = %s", (hash_password(password), user_id))
+        except Exception as e:
+            # The login itself succeeded; the upgrade is retried next time
+            print(f"Could not rehash the password of user {user_id}: {e}")
+    return user_id
+
+
+def register(username, password):
+    """Insert the user unless the name is taken; returns whether it was."""
+    wait_for_database()
+    with db_cursor(commit=True) as cursor:
+        if cursor.execute("SELECT id FROM users WHERE username = %s", (username,)).fetchone():
+            return False
+        cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s)", (username, hash_password(password)))
+    return True
 
 
 class AuthApp:
@@ -10,6 +52,9 @@ class AuthApp:
         self.root.title("Login & Signup")
         self.root.geometry("400x300")
 
+        # Database round-trips run on a worker so the window stays responsive
+        self.tasks = TaskScheduler(self.root)
+
         # Frames for Login and Signup
         self.frame = ttk.Frame(self.root, padding=10)
         self.frame.pack(expand=True)
@@ -32,7 +77,8 @@ class AuthApp:
         self.password_entry = ttk.Entry(self.frame, show="*", width=15)
         self.password_entry.grid(row=2, column=1, padx=5, pady=5)
 
-        ttk.Button(self.frame, text="Login", command=self.login).grid(row=3, column=0, padx=5, pady=10)
+        self.submit_button = ttk.Button(self.frame, text="Login", command=self.login)
+        self.submit_button.grid(row=3, column=0, padx=5, pady=10)
         ttk.Button(self.frame, text="Signup", command=self.signup_widgets).grid(row=3, column=1, padx=5, pady=10)
 
     def signup_widgets(self):
@@ -50,7 +96,8 @@ class AuthApp:
         self.password_entry = ttk.Entry(self.frame, show="*", width=15)
         self.password_entry.grid(row=2, column=1, padx=5, pady=5)
 
-        ttk.Button(self.frame, text="Signup", command=self.signup).grid(row=3, column=0, padx=5, pady=10)
+        self.submit_button = ttk.Button(self.frame, text="Signup", command=self.signup)
+        self.submit_button.grid(row=3, column=0, padx=5, pady=10)
         ttk.Button(self.frame, text="Back to Login", command=self.login_widgets).grid(row=3, column=1, padx=5, pady=10)
 
     def login(self):
@@ -62,21 +109,28 @@ class AuthApp:
             messagebox.showerror("Error", "All fields are required!")
             return
 
-        conn = connect_db()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE username = %s AND password = %s", (username, password))
-            user = cursor.fetchone()
-            conn.close()
-
-            if user:
-                messagebox.showinfo("Success", f"Welcome, {username}!")
-                self.root.destroy()
-                self.navigation_manager.show_fitness_app()
-                
-                
-            else:
-                messagebox.showerror("Error", "Invalid credentials!")
+        self.submit_button.config(state="disabled")
+        self.tasks.submit("Login", lambda task: authenticate(username, password),
+                          on_done=lambda user_id: self.finish_login(username, user_id),
+                          on_error=lambda e: self.show_error(f"Could not reach the database: {e}"))
+
+    def finish_login(self, username, user_id):
+        if user_id is not None:
+            try:
+                # Remembered, so the next start skips the login
+                start_session(user_id, username)
+            except OSError as e:
+                print(f"Could not save the session: {e}")
+            messagebox.showinfo("Success", f"Welcome, {username}!")
+            self.tasks.shutdown()
+            self.root.destroy()
+            self.navigation_manager.show_fitness_app(user_id)
+        else:
+            self.show_error("Invalid credentials!")
+
+    def show_error(self, message):
+        self.submit_button.config(state="normal")
+        messagebox.showerror("Error", message)
 
     def signup(self):
         """Handle the signup process."""
@@ -87,13 +141,14 @@ class AuthApp:
             messagebox.showerror("Error", "All fields are required!")
             return
 
-        conn = connect_db()
-        if conn:
-            cursor = conn.cursor()
-            try:
-                cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s)", (username, password))
-                conn.commit()
-                messagebox.showinfo("Success", "Signup successful! Please login.")
-                self.login_widgets()
-            except Error as e:
-                messagebox.showerror("Error")
+        self.submit_button.config(state="disabled")
+        self.tasks.submit("Signup", lambda task: register(username, password),
+                          on_done=self.finish_signup, on_error=lambda e: self.show_error(f"Signup failed: {e}"))
+
+    def finish_signup(self, created):
+        if not created:
+            self.show_error("Username already taken!")
+            return
+        messagebox.showinfo("Success", "Signup successful! Please login.")
+        self.login_widgets()
+
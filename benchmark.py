@@ -0,0 +1,337 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+matplotlib.use('Agg')  # Charts are drawn off-screen
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import db_setup
+from auth import authenticate, register
+from credentials import verification_cache
+from csv_io import export_csv, import_csv
+from engine import FitnessEngine
+from lod import LodCache, LodLine, plot_x
+from record_store import FitnessRecordStore
+from storage import MemoryMappedStorage
+
+SIZES = (1000, 10000, 100000, 1000000, 10000000)
+REPEATS = 5  # Runs per measurement; the median is reported
+ADD_ROWS = 1000  # Entries added one by one, as the Add Data button does
+LOGINS = 5
+REGRESSION = 1.25  # A metric this many times slower than the baseline is reported as a regression
+
+SEARCHES = ('legs', 'day:mon', 'split:push weight>80', 'cal:2000-2600 day:fri', 'sn<500')
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+SPLITS = ['Push', 'Pull', 'Legs', 'Upper', 'Lower', 'Cardio', 'Rest']
+FIRST_DATE = np.datetime64('2000-01-03')  # A Monday
+MAX_DAYS = 20 * 365  # Larger logs get several entries per day
+
+
+# ---------------- Synthetic data ---------------- #
+
+def synthetic_log(rows, seed=0):
+    """A DataFrame of `rows` plausible daily entries in fitness.csv's layout.
+
+    Entries are dated one per day from FIRST_DATE (several per day past
+    MAX_DAYS rows). Weight is a slow random walk around 75 kg and the diet
+    varies around 2500 calories; the unit strings are filled in like the
+    app's own file.
+    """
+    rng = np.random.default_rng(seed)
+    days = np.arange(rows) // max(1, -(-rows // MAX_DAYS))
+    weight = np.round(75 + np.cumsum(rng.normal(0, 0.05, rows)).clip(-20, 20) + rng.normal(0, 0.3, rows), 1)
+    diet = np.round(rng.normal(2500, 300, rows)).clip(1200, 4500)
+    frame = pd.DataFrame({
+        'Serial_No': np.arange(1, rows + 1),
+        'Date': np.datetime_as_string(FIRST_DATE + days, unit='D'),
+        'Day': np.array(DAYS)[days % 7],
+        'Weight': pd.Series(weight).astype(str) + ' kg',
+        'Exercise_Split': np.array(SPLITS)[rng.integers(0, len(SPLITS), rows)],
+        'Diet': pd.Series(diet.astype(int)).astype(str) + ' cal',
+        'Weight (kg)': weight,
+        'Diet (Calories)': diet,
+    })
+    return frame
+
+
+def write_synthetic_log(path, rows, seed=0, chunk_rows=1000000):
+    """Write synthetic_log(rows) to a CSV in chunks, so 10M rows fit in memory."""
+    for start in range(0, rows, chunk_rows):
+        chunk = synthetic_log(min(chunk_rows, rows - start), seed + start)
+        chunk['Serial_No'] += start
+        chunk.to_csv(path, mode='a' if start else 'w', header=not start, index=False)
+
+
+# ---------------- Measurements ---------------- #
+
+def timed(fn, *args):
+    """(seconds, result) of one call."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def median_time(fn, *args, repeats=REPEATS):
+    return statistics.median(timed(fn, *args)[0] for _ in range(repeats))
+
+
+def result(seconds, rows=None):
+    measured = {'seconds': seconds}
+    if rows is not None:
+        measured['rows_per_second'] = rows / seconds if seconds else None
+    return measured
+
+
+def bench_size(rows, workdir, seed=0):
+    """Measure every data path on a synthetic log of `rows` entries."""
+    results = {}
+    csv_path = os.path.join(workdir, f'fitness_{rows}.csv')
+    print(f"{rows} rows: generating data...", flush=True)
+    write_synthetic_log(csv_path, rows, seed)
+
+    # Load/save throughput: the CSV import and export, and the memory-mapped format the app saves in
+    store = FitnessRecordStore()
+    seconds, _ = timed(import_csv, csv_path, store)
+    results['csv_load'] = result(seconds, rows)
+    seconds, _ = timed(export_csv, store.frame(), os.path.join(workdir, 'export.csv'))
+    results['csv_save'] = result(seconds, rows)
+    storage = MemoryMappedStorage(os.path.join(workdir, f'data_{rows}'))
+    results['save'] = result(median_time(storage.save, store), rows)
+    results['load'] = result(median_time(storage.load, FitnessRecordStore()), rows)
+    del store
+
+    engine = FitnessEngine(storage=storage)
+    engine.load()
+
+    # search_data: the first query also builds the index
+    seconds, _ = timed(engine.search, SEARCHES[0])
+    results['search_first'] = result(seconds, rows)
+    results['search'] = result(statistics.median(median_time(engine.search, query) for query in SEARCHES), rows)
+
+    # Date index: built on first use, then binary-searched; resampling reads only the range
+    timeseries = engine.timeseries
+    results['date_index'] = result(timed(len, timeseries)[0], rows)
+    first, last = timeseries.span()
+    middle = first + (last - first) // 2
+    results['date_range'] = result(median_time(timeseries.between, middle, middle + np.timedelta64(30, 'D')))
+    results['resample_week'] = result(median_time(timeseries.resample, 'week'), rows)
+    results['resample_month'] = result(median_time(timeseries.resample, 'month'), rows)
+
+    # add_data: one entry at a time, each journaled like in the app
+    serial = rows + 1
+    started = time.perf_counter()
+    for i in range(ADD_ROWS):
+        engine.add(serial + i, DAYS[i % 7], 75.0, SPLITS[i % len(SPLITS)], 2500, '2030-01-01')
+    results['add'] = result(time.perf_counter() - started, ADD_ROWS)
+
+    # Breakdowns by Exercise_Split: the cube is built once, then answers from its cells
+    aggregates = engine.aggregates
+    results['cube_build'] = result(timed(aggregates.cube, 'month')[0], len(engine))
+    results['cube_query'] = result(median_time(lambda: aggregates.cube('month').frame('Legs')))
+
+    # Sorting the table: one argsort per column, then kept up to date as entries are added
+    sorting = engine.sorting
+    results['sort_first'] = result(timed(sorting.order, [('Weight (kg)', True)])[0], len(engine))
+    results['sort_multi'] = result(timed(sorting.order, [('Exercise_Split', True), ('Date', False)])[0], len(engine))
+
+    serials = itertools.count(rows + ADD_ROWS + 1)
+
+    def add_and_sort():
+        engine.add(next(serials), 'Monday', 75.0, 'Legs', 2500, '2030-01-01')
+        return sorting.order([('Weight (kg)', True)])
+
+    results['sort_after_add'] = result(median_time(add_and_sort), len(engine))
+
+    # Batch edit and delete of a selection spread over the log, each in one store update
+    selection = engine.frame().index[::max(1, len(engine) // ADD_ROWS)][:ADD_ROWS]
+    seconds, selection = timed(lambda: engine.edit_rows(selection, weight='80'))
+    results['edit_batch'] = result(seconds, len(selection))
+    results['delete_batch'] = result(timed(engine.delete_rows, selection)[0], len(selection))
+
+    # update_table: rebuild the frame after a change, then re-render the visible rows
+    results['frame'] = result(timed(engine.frame)[0], len(engine))
+    results['table_refresh'] = bench_table(engine.frame())
+
+    results['chart_redraw'], results['chart_zoom'] = bench_chart(engine.trend(), engine.store.version)
+    engine.close()
+
+    shutil.rmtree(storage.path, ignore_errors=True)
+    os.remove(csv_path)
+    return results
+
+
+def bench_table(data):
+    """Median time of VirtualTable.set_data; skipped without a display."""
+    import tkinter as tk
+    from virtual_table import VirtualTable
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {'skipped': f"no display ({e})"}
+    try:
+        root.withdraw()
+        table = VirtualTable(root, ['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'])
+        table.tree.pack()
+
+        def refresh():
+            table.set_data(data)
+            root.update_idletasks()
+
+        return result(median_time(refresh), len(data))
+    finally:
+        root.destroy()
+
+
+def bench_chart(data, version):
+    """Times of drawing the trend chart as FitnessApp.show_plot does, and of redrawing it zoomed in."""
+    def draw():
+        lod_cache = LodCache()
+        figure, axes = plt.subplots(figsize=(10, 6))
+        lod_lines = []
+        for column, marker in (('Weight (kg)', 'o'), ('Diet (Calories)', 'x')):
+            line, = axes.plot([], [], marker=marker, linewidth=2)
+            lod_lines.append(LodLine(line, plot_x(data.index), data[column],
+                                     lod_cache.pyramid(version, column, data[column])))
+        for lod_line in lod_lines:
+            lod_line.refresh(full=True)
+        axes.relim()
+        axes.autoscale_view()
+        figure.canvas.draw()
+        return figure, axes, lod_lines
+
+    seconds, (figure, axes, lod_lines) = timed(draw)
+    plt.close(figure)
+
+    figure, axes, lod_lines = draw()
+    low, high = axes.get_xlim()
+
+    def zoom():
+        axes.set_xlim(low + (high - low) * 0.45, low + (high - low) * 0.55)
+        for lod_line in lod_lines:
+            lod_line.refresh()
+        figure.canvas.draw()
+
+    zoomed = median_time(zoom)
+    plt.close(figure)
+    return result(seconds, len(data)), result(zoomed)
+
+
+def bench_login(workdir):
+    """Login round-trips against a throwaway SQLite database, with and without the verification cache."""
+    db_setup.configure(backend='sqlite', sqlite_path=os.path.join(workdir, 'fitapp.db'))
+    db_setup.create_database()
+    register('benchmark', 'benchmark password')
+
+    def cold_login():
+        verification_cache.clear()
+        return authenticate('benchmark', 'benchmark password')
+
+    results = {
+        'login': result(median_time(cold_login, repeats=LOGINS)),
+        'login_cached': result(median_time(authenticate, 'benchmark', 'benchmark password', repeats=LOGINS)),
+        'login_unknown_user': result(median_time(authenticate, 'nobody', 'benchmark password', repeats=LOGINS)),
+    }
+    db_setup.get_pool().close_all()
+    return results
+
+
+# ---------------- Reports ---------------- #
+
+def version_label():
+    """`git describe` of the working tree, if it is a git checkout."""
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, label=None, seed=0):
+    report = {
+        'version': label or version_label(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        'sizes': {},
+    }
+    workdir = tempfile.mkdtemp(prefix='fitness-benchmark-')
+    try:
+        report['login'] = bench_login(workdir)
+        for rows in sizes:
+            report['sizes'][str(rows)] = bench_size(rows, workdir, seed)
+            print_results(f"{rows} rows", report['sizes'][str(rows)])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print_results("Login", report['login'])
+    return report
+
+
+def print_results(title, results):
+    print(title)
+    for name, measured in results.items():
+        if 'skipped' in measured:
+            print(f"  {name:<20} skipped: {measured['skipped']}")
+            continue
+        rate = measured.get('rows_per_second')
+        rate = f"  {rate:,.0f} rows/s" if rate else ""
+        print(f"  {name:<20} {measured['seconds'] * 1000:10.2f} ms{rate}")
+
+
+def _timings(report):
+    timings = {('login', name): measured['seconds'] for name, measured in report.get('login', {}).items()}
+    for rows, results in report.get('sizes', {}).items():
+        for name, measured in results.items():
+            if 'seconds' in measured:
+                timings[(rows, name)] = measured['seconds']
+    return timings
+
+
+def compare(baseline, report, threshold=REGRESSION):
+    """Print each timing against the baseline report; returns the metrics that got slower than `threshold`."""
+    old, new = _timings(baseline), _timings(report)
+    print(f"Compared with {baseline.get('version') or 'baseline'} ({baseline.get('created', '?')}):")
+    regressions = []
+    for key in sorted(old.keys() & new.keys(), key=lambda key: (key[0] != 'login', key[0].zfill(12), key[1])):
+        ratio = new[key] / old[key] if old[key] else float('inf')
+        flag = ""
+        if ratio > threshold:
+            flag = "  <-- slower"
+            regressions.append(key)
+        print(f"  {key[0]:>10} {key[1]:<20} {old[key] * 1000:10.2f} ms -> {new[key] * 1000:10.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the fitness log's data paths on synthetic logs.")
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)),
+                        help="comma-separated row counts (default: %(default)s)")
+    parser.add_argument('--output', default='benchmark.json', help="where to save the results as JSON")
+    parser.add_argument('--compare', metavar='BASELINE', help="results JSON of an earlier run to compare against")
+    parser.add_argument('--label', help="version label stored with the results (default: git describe)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = run([int(size) for size in args.sizes.split(',')], args.label, args.seed)
+    with open(args.output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            if compare(json.load(handle), report):
+                sys.exit(1)
@@ -0,0 +1,138 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+
+from bulk_entry import describe_problems, parse_text, read_file
+from record_store import COLUMNS
+
+
+class BulkEntryDialog:
+    """Window for adding many entries at once, pasted as rows or imported from a CSV/JSON file.
+
+    The whole batch is validated in one pass and every rejected row is
+    listed; the valid rows are handed to `add_rows(rows, report)` together,
+    which commits them in a single update (possibly later, once a running
+    load or save is done) and then calls `report(added, error)`.
+    """
+
+    def __init__(self, parent, engine, add_rows):
+        self.engine = engine
+        self.add_rows = add_rows
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Bulk Add")
+        self.window.transient(parent)
+
+        ttk.Label(self.window, text="Paste rows (tab- or comma-separated): " + ", ".join(COLUMNS)).grid(
+            row=0, column=0, columnspan=3, padx=10, pady=5, sticky="w")
+        self.text = tk.Text(self.window, width=80, height=12)
+        self.text.grid(row=1, column=0, columnspan=3, padx=10, pady=5)
+
+        ttk.Button(self.window, text="Add Rows", command=self.add_pasted).grid(row=2, column=0, padx=5, pady=5)
+        ttk.Button(self.window, text="Import File...", command=self.import_file).grid(row=2, column=1, padx=5, pady=5)
+        ttk.Button(self.window, text="Close", command=self.window.destroy).grid(row=2, column=2, padx=5, pady=5)
+
+        self.message_label = ttk.Label(self.window, text="", style="Success.TLabel")
+        self.message_label.grid(row=3, column=0, columnspan=3, padx=10, pady=5)
+        self.problems = tk.Text(self.window, width=80, height=8, state="disabled", foreground="red")
+        self.problems.grid(row=4, column=0, columnspan=3, padx=10, pady=5)
+
+    def update_status(self, message, success=True):
+        self.message_label.config(text=message, style="Success.TLabel" if success else "Error.TLabel")
+
+    def show_problems(self, problems):
+        self.problems.config(state="normal")
+        self.problems.delete("1.0", "end")
+        self.problems.insert("1.0", describe_problems(problems))
+        self.problems.config(state="disabled")
+
+    def add_pasted(self):
+        try:
+            raw = parse_text(self.text.get("1.0", "end"))
+        except ValueError as e:
+            self.update_status(str(e), success=False)
+            return
+        self.submit(raw, clear_text=True)
+
+    def import_file(self):
+        path = filedialog.askopenfilename(parent=self.window, title="Import entries",
+                                          filetypes=[("CSV or JSON", "*.csv *.json"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            raw = read_file(path)
+        except (OSError, ValueError) as e:
+            self.update_status(f"Error importing {path}: {e}", success=False)
+            return
+        self.submit(raw)
+
+    def submit(self, raw, clear_text=False):
+        """Validate a batch and pass its valid rows on to be added."""
+        rows, problems = self.engine.validate_rows(raw)
+        self.show_problems(problems)
+        if not len(raw):
+            self.update_status("No rows to add.", success=False)
+            return
+        if not len(rows):
+            self.update_status(f"None of the {len(raw)} rows can be added.", success=False)
+            return
+        if len(problems) and not messagebox.askyesno(
+                "Bulk Add", f"{len(problems)} of {len(raw)} rows have problems and will be skipped. "
+                            f"Add the other {len(rows)}?", parent=self.window):
+            self.update_status(f"{len(problems)} rows have problems; nothing added.", success=False)
+            return
+
+        def report(added, error=None):
+            if not self.window.winfo_exists():
+                return
+            if error is not None:
+                self.update_status(f"Nothing added: {error}", success=False)
+                return
+            if clear_text:
+                self.text.delete("1.0", "end")
+            skipped = f" Skipped {len(problems)}." if len(problems) else ""
+            self.update_status(f"Added {added} rows.{skipped}", success=True)
+
+        self.update_status(f"Adding {len(rows)} rows...", success=True)
+        self.add_rows(rows, report)
+
+
+class BulkEditDialog:
+    """Window for giving the selected entries new values; fields left blank are not changed.
+
+    `apply_changes(changes)` gets the typed-in values, keyed like the
+    arguments of FitnessEngine.edit_rows.
+    """
+
+    FIELDS = [('Date (YYYY-MM-DD)', 'date'), ('Day', 'day'), ('Weight (kg)', 'weight'),
+              ('Exercise Split', 'exercise_split'), ('Diet (Calories)', 'diet')]
+
+    def __init__(self, parent, count, apply_changes):
+        self.apply_changes = apply_changes
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(f"Edit {count} Rows")
+        self.window.transient(parent)
+
+        ttk.Label(self.window, text=f"New values for the {count} selected rows (blank keeps the current value):").grid(
+            row=0, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+        self.entries = {}
+        for row, (label, name) in enumerate(self.FIELDS, 1):
+            ttk.Label(self.window, text=label).grid(row=row, column=0, padx=5, pady=5, sticky="w")
+            self.entries[name] = ttk.Entry(self.window, width=20)
+            self.entries[name].grid(row=row, column=1, padx=5, pady=5)
+
+        buttons = ttk.Frame(self.window)
+        buttons.grid(row=len(self.FIELDS) + 1, column=0, columnspan=2, pady=5)
+        ttk.Button(buttons, text="Apply", command=self.apply).grid(row=0, column=0, padx=5)
+        ttk.Button(buttons, text="Cancel", command=self.window.destroy).grid(row=0, column=1, padx=5)
+
+        self.message_label = ttk.Label(self.window, text="", style="Error.TLabel")
+        self.message_label.grid(row=len(self.FIELDS) + 2, column=0, columnspan=2, padx=10, pady=5)
+
+    def apply(self):
+        changes = {name: entry.get().strip() for name, entry in self.entries.items()}
+        if not any(changes.values()):
+            self.message_label.config(text="Enter at least one new value.")
+            return
+        self.window.destroy()
+        self.apply_changes(changes)
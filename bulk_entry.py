@@ -0,0 +1,135 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from csv_io import parse_dates, parse_units
+from record_store import COLUMNS
+
+LEGACY_COLUMNS = [column for column in COLUMNS if column != 'Date']  # Rows pasted from logs without dates
+NUMBERS = {'Serial_No': 'Serial No.', 'Weight (kg)': 'Weight', 'Diet (Calories)': 'Diet'}
+SERIAL_LIMIT = 2 ** 31  # Serial Nos must fit the workouts table's INT column
+
+
+def parse_text(text):
+    """Rows pasted as text, one per line, as a DataFrame of strings indexed by row number (from 1).
+
+    Fields are tab-separated (as copied from a spreadsheet) or
+    comma-separated, in the table's column order or with a header line
+    naming the columns. Rows without a date may leave out the Date field
+    altogether. Raises ValueError for text that is not a table.
+    """
+    lines = text.strip()
+    if not lines:
+        return _numbered(pd.DataFrame(columns=COLUMNS, dtype='string'))
+    sep = '\t' if '\t' in lines.splitlines()[0] else ','
+    header = 0 if lines.split(sep, 1)[0].strip().lower().startswith('serial') else None
+    try:
+        raw = pd.read_csv(io.StringIO(lines), sep=sep, header=header, dtype='string', skipinitialspace=True)
+    except pd.errors.ParserError as e:
+        raise ValueError(f"Could not read the rows: {e}") from None
+    if header is None:
+        names = LEGACY_COLUMNS if raw.shape[1] == len(LEGACY_COLUMNS) else COLUMNS
+        if raw.shape[1] > len(names):
+            raise ValueError(f"Rows have {raw.shape[1]} fields; expected {len(COLUMNS)}: {', '.join(COLUMNS)}.")
+        raw.columns = names[:raw.shape[1]]
+    return _numbered(raw)
+
+
+def read_file(path):
+    """Rows of a CSV file with a header line, or of a JSON file, as a DataFrame of strings.
+
+    JSON may hold a list of records or a mapping of column -> values.
+    Raises OSError if the file cannot be read and ValueError if it cannot
+    be parsed.
+    """
+    if os.path.splitext(path)[1].lower() == '.json':
+        raw = pd.read_json(path, dtype=False, convert_dates=False)
+    else:
+        try:
+            raw = pd.read_csv(path, dtype='string', skipinitialspace=True)
+        except pd.errors.ParserError as e:
+            raise ValueError(f"Could not read {path}: {e}") from None
+    return _numbered(raw)
+
+
+def _numbered(raw):
+    raw = raw.reset_index(drop=True)
+    raw.index = raw.index + 1
+    return raw
+
+
+def validate(raw, store):
+    """Check and coerce a batch of raw rows column by column; returns (rows, problems).
+
+    `rows` holds the valid rows as a DataFrame ready for
+    FitnessRecordStore.extend(). `problems` is a Series of messages for
+    every rejected row, indexed like `raw`. Serial No., Weight and Diet
+    must be numbers (Weight and Diet may carry units, "70.5 kg") and the
+    Serial No. a whole number that fits the database's INT column. The
+    Date must be YYYY-MM-DD when given, and a blank Day is taken from it.
+    Rows whose Serial No. is already in the store, or repeats an earlier
+    row of the batch, are rejected as duplicates.
+    """
+    text = raw.reindex(columns=COLUMNS).apply(_text)  # Missing columns come out blank
+    numbers = {column: pd.to_numeric(text[column], errors='coerce') for column in NUMBERS}
+    for column in ('Weight (kg)', 'Diet (Calories)'):
+        numbers[column] = numbers[column].astype('float32')
+        # Only the few values that are not plain numbers go through the slower unit parse
+        unparsed = numbers[column].isna() & text[column].notna()
+        if unparsed.any():
+            numbers[column] = numbers[column].fillna(parse_units(text[column][unparsed]))
+    dates = parse_dates(text['Date'])
+    days = text['Day'].fillna(dates.dt.day_name().astype('string'))
+
+    checks = []
+    for column, name in NUMBERS.items():
+        checks.append((text[column].isna(), f"{name} is missing"))
+        checks.append((text[column].notna() & numbers[column].isna(), f"{name} is not a number"))
+    serials = numbers['Serial_No']
+    checks.append((serials.notna() & (serials % 1 != 0), "Serial No. is not a whole number"))
+    in_range = (serials >= -SERIAL_LIMIT) & (serials < SERIAL_LIMIT)
+    checks.append((serials.notna() & ~in_range, f"Serial No. is out of range (±{SERIAL_LIMIT:,})"))
+    checks.append((text['Date'].notna() & dates.isna(), "Date is not YYYY-MM-DD"))
+    checks.append((days.isna(), "Day is missing (give a Day or a Date)"))
+    checks.append((text['Exercise_Split'].isna(), "Exercise Split is missing"))
+
+    problems = pd.Series('', index=raw.index, dtype=object)
+    for failed, message in checks:
+        problems[failed.to_numpy(dtype=bool)] += '; ' + message
+
+    # Duplicates are only looked for among the serials that are valid numbers
+    serials = serials.where((serials % 1 == 0) & in_range).astype('Int64')
+    valid = serials.notna().to_numpy()
+    existing = np.zeros(len(raw), dtype=bool)
+    existing[valid] = store.contains(serials[valid].to_numpy(dtype=np.int64))
+    repeated = (serials.duplicated(keep='first') & serials.notna()).to_numpy() & ~existing
+    named = serials.astype('string')
+    problems[existing] += '; Serial No. ' + named[existing] + ' already exists'
+    problems[repeated] += '; Serial No. ' + named[repeated] + ' repeats an earlier row'
+
+    accepted = (problems == '').to_numpy()
+    rows = pd.DataFrame({
+        'Serial_No': serials[accepted].to_numpy(dtype=np.int64),
+        'Date': dates[accepted].to_numpy(dtype='datetime64[s]'),
+        'Day': days[accepted].to_numpy(dtype=object),
+        'Weight (kg)': numbers['Weight (kg)'][accepted].to_numpy(dtype=np.float32),
+        'Exercise_Split': text['Exercise_Split'][accepted].to_numpy(dtype=object),
+        'Diet (Calories)': numbers['Diet (Calories)'][accepted].to_numpy(dtype=np.float32),
+    }, index=raw.index[accepted])
+    return rows, problems[~accepted].str[2:]
+
+
+def _text(values):
+    """A column as trimmed strings, with blanks as missing."""
+    values = values.astype('string').str.strip()
+    return values.mask(values == '')
+
+
+def describe_problems(problems, limit=20):
+    """The first `limit` rejected rows as "Row n: ..." lines, plus a count of the rest."""
+    lines = [f"Row {row}: {message}" for row, message in problems.iloc[:limit].items()]
+    if len(problems) > limit:
+        lines.append(f"... and {len(problems) - limit} more rows.")
+    return "\n".join(lines)
@@ -0,0 +1,100 @@
+import tkinter as tk
+from tkinter import ttk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from lod import LodCache, LodLine, date_axis, follow_view, plot_x
+
+
+class TrendChart:
+    """Embedded weight/calorie line chart that is built once and updated in place.
+
+    The figure, axes and Line2D artists are created a single time. New data is
+    pushed into the lines with set_data; when the axis limits stay the same the
+    lines are blitted over a cached background instead of redrawing the whole
+    figure. Updates requested within one event-loop tick are coalesced into a
+    single redraw. Each line draws a min/max level-of-detail view of its series
+    sized to the axes width, taken from pyramids cached per dataset version.
+    Data indexed by dates is plotted against a date axis.
+    """
+
+    def __init__(self, master, title="Dynamic Fitness Trends", xlabel="Entry Index"):
+        self.figure = Figure(figsize=(8, 5))
+        self.ax = self.figure.add_subplot()
+        self.weight_line, = self.ax.plot([], [], marker='o', label='Weight (kg)', color='blue', animated=True)
+        self.calories_line, = self.ax.plot([], [], marker='x', label='Diet (Calories)', color='orange', animated=True)
+        self.ax.set_title(title, fontsize=16, fontweight="bold")
+        self.ax.set_xlabel(xlabel, fontsize=12)
+        self.xlabel = xlabel
+        self.dated = False
+        self.ax.set_ylabel("Values", fontsize=12)
+        self.ax.legend(fontsize=10)
+        self.ax.grid(color='gray', linestyle='--', linewidth=0.5, alpha=0.7)
+
+        # Embed Matplotlib Figure in Tkinter
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.no_data_label = ttk.Label(master, text="No data to display.", font=("Helvetica", 14, "bold"))
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+        self.lod_cache = LodCache()
+        self._lod_lines = []
+        follow_view(self.ax, self._lod_lines)
+
+        self._background = None
+        self._pending = None
+        self._scheduled = None
+
+    def update(self, data, version):
+        """Queue a redraw with the latest data; several calls in one tick draw once.
+
+        `version` identifies the dataset (e.g. the store version) for the LOD cache.
+        """
+        self._pending = (data, version)
+        if self._scheduled is None:
+            self._scheduled = self.widget.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._scheduled = None
+        data, version = self._pending
+
+        if data.empty:
+            self.widget.pack_forget()
+            self.no_data_label.pack()
+            return
+        self.no_data_label.pack_forget()
+        if not self.widget.winfo_manager():
+            self.widget.pack(fill=tk.BOTH, expand=True)
+
+        dated = data.index.dtype.kind == 'M'
+        if dated != self.dated:
+            self.dated = dated
+            date_axis(self.ax, dated)
+            self.ax.set_xlabel("Date" if dated else self.xlabel, fontsize=12)
+            self._background = None
+        x = plot_x(data.index)
+        self._lod_lines[:] = [
+            LodLine(line, x, data[column], self.lod_cache.pyramid(version, column, data[column]), marker)
+            for line, column, marker in ((self.weight_line, 'Weight (kg)', 'o'), (self.calories_line, 'Diet (Calories)', 'x'))
+        ]
+        for lod_line in self._lod_lines:
+            lod_line.refresh(full=True)
+
+        limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        self.ax.relim()
+        self.ax.autoscale_view()
+        if self._background is None or limits != (self.ax.get_xlim(), self.ax.get_ylim()):
+            # Ticks and gridlines change with the limits, so redraw everything
+            self.canvas.draw_idle()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_lines()
+
+    def _on_draw(self, event):
+        """Cache the static background after a full draw and put the lines back on top."""
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        self.ax.draw_artist(self.weight_line)
+        self.ax.draw_artist(self.calories_line)
+        self.canvas.blit(self.figure.bbox)
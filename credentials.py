@@ -0,0 +1,179 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Current hashing parameters; stored hashes made with others are upgraded on login (see needs_rehash)
+SCHEME = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2_sha256"
+SCRYPT_N = 2 ** 14  # CPU/memory cost: 128 * N * R bytes per hash (16 MiB)
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600000
+SALT_BYTES = 16
+CACHE_SIZE = 64  # Recently verified logins kept in memory
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _derive(password, salt, scheme, params):
+    password = password.encode("utf-8")
+    if scheme == "scrypt":
+        n, r, p = params
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=32)
+    return hashlib.pbkdf2_hmac("sha256", password, salt, params[0])
+
+
+def current_params(scheme=None):
+    scheme = scheme or SCHEME
+    return (SCRYPT_N, SCRYPT_R, SCRYPT_P) if scheme == "scrypt" else (PBKDF2_ITERATIONS,)
+
+
+def hash_password(password, scheme=None, params=None):
+    """Salted hash of a password as "<scheme>$<params>$<salt>$<hash>"."""
+    scheme = scheme or SCHEME
+    params = params or current_params(scheme)
+    salt = os.urandom(SALT_BYTES)
+    digest = _derive(password, salt, scheme, params)
+    return "$".join([scheme, ",".join(map(str, params)), _b64(salt), _b64(digest)])
+
+
+def _parse(stored):
+    """(scheme, params, salt, digest) of a stored hash, or None for a legacy plaintext password.
+
+    Anything that is not a well-formed hash counts as plaintext, e.g. an
+    old password that happens to start with "scrypt$".
+    """
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] not in ("scrypt", "pbkdf2_sha256"):
+        return None
+    scheme, params, salt, digest = parts
+    try:
+        params = tuple(int(value) for value in params.split(","))
+        salt = base64.b64decode(salt, validate=True)
+        digest = base64.b64decode(digest, validate=True)
+    except ValueError:
+        return None
+    if scheme == "scrypt":
+        valid = len(params) == 3 and params[0] > 1 and params[0] & (params[0] - 1) == 0 and min(params) >= 1
+    else:
+        valid = len(params) == 1 and params[0] >= 1
+    if not valid or not salt or not digest:
+        return None
+    return scheme, params, salt, digest
+
+
+def needs_rehash(stored):
+    """Whether a stored password is plaintext or was hashed with other than the current parameters."""
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] != SCHEME or parsed[1] != current_params()
+
+
+def verify_password(password, stored):
+    """Check a password against its stored hash in constant time.
+
+    Rows from before hashing hold the plaintext password; those are
+    compared directly (see needs_rehash for upgrading them).
+    """
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    scheme, params, salt, digest = parsed
+    return hmac.compare_digest(_derive(password, salt, scheme, params), digest)
+
+
+# Hash checked against when a username does not exist, so the reply takes as long as a real check
+_DUMMY_HASH = None
+
+
+def verify_missing_user(password):
+    """Spend the time of a real verification and fail."""
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = hash_password("")
+    verify_password(password, _DUMMY_HASH)
+    return False
+
+
+class VerificationCache:
+    """Remembers recent successful verifications so a repeated login skips the KDF.
+
+    Entries are keyed by an HMAC of the stored hash and the password under a
+    random key that only lives in this process, so nothing reusable is kept
+    and a changed password hash never matches an old entry.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _token(self, password, stored):
+        return hmac.new(self._key, f"{stored}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+
+    def verify(self, password, stored):
+        token = self._token(password, stored)
+        with self._lock:
+            if token in self._entries:
+                self._entries.move_to_end(token)
+                return True
+        if not verify_password(password, stored):
+            return False
+        with self._lock:
+            self._entries[token] = True
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verification_cache = VerificationCache()
+
+
+# ---------------- Tuning ---------------- #
+
+def benchmark(scheme=None, params=None, rounds=5):
+    """Mean seconds one hash takes with the given (default: current) parameters."""
+    scheme = scheme or SCHEME
+    params = params or current_params(scheme)
+    salt = os.urandom(SALT_BYTES)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        _derive("benchmark password", salt, scheme, params)
+    return (time.perf_counter() - started) / rounds
+
+
+def tune(target_ms=100, rounds=3):
+    """Strongest parameters of the current scheme whose hash still takes at most `target_ms`.
+
+    Returns (params, milliseconds). Doubles scrypt's N from 2**12, or
+    PBKDF2's iterations from 100000. Assign the result to SCRYPT_N or
+    PBKDF2_ITERATIONS to adopt it; older hashes are upgraded on their next login.
+    """
+    if SCHEME == "scrypt":
+        candidates = [(2 ** exponent, SCRYPT_R, SCRYPT_P) for exponent in range(12, 21)]
+    else:
+        candidates = [(100000 * 2 ** step,) for step in range(6)]
+    best = None
+    for params in candidates:
+        elapsed = benchmark(SCHEME, params, rounds) * 1000
+        if best is not None and elapsed > target_ms:
+            break
+        best = (params, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+    seconds = benchmark()
+    print(f"{SCHEME} {current_params()}: {seconds * 1000:.1f} ms per hash, "
+          f"{1 / seconds:.1f} logins/s per worker thread")
+    params, elapsed = tune()
+    print(f"Strongest parameters within 100 ms: {params} ({elapsed:.1f} ms)")
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from record_store import COLUMNS, NO_DATE
+
+CHUNK_ROWS = 50000
+
+# On-disk schema. fitness.csv may also carry "Weight"/"Diet" strings with
+# units ("70.5 kg", "3003 cal"); they fill in numbers missing from the
+# numeric columns and are otherwise ignored.
+SCHEMA = {
+    'Serial_No': 'float64',  # Parsed as float so missing serials can be dropped
+    'Date': 'string',
+    'Day': 'category',
+    'Weight (kg)': 'float32',
+    'Exercise_Split': 'category',
+    'Diet (Calories)': 'float32',
+    'Weight': 'string',
+    'Diet': 'string',
+}
+UNIT_COLUMNS = {'Weight (kg)': 'Weight', 'Diet (Calories)': 'Diet'}
+
+_NUMBER = r'(-?\d+(?:\.\d+)?)'
+
+
+def parse_units(values):
+    """Vectorized parse of unit-suffixed strings like "70.5 kg" into float32."""
+    return pd.to_numeric(values.str.extract(_NUMBER, expand=False), errors='coerce').astype('float32')
+
+
+def parse_dates(values):
+    """Vectorized parse of ISO dates ("2024-03-01"); blank or malformed ones become NaT."""
+    dates = pd.Series(NO_DATE, index=values.index)
+    present = values.notna()
+    if present.any():
+        dates[present] = pd.to_datetime(values[present], errors='coerce', format='ISO8601')
+    return dates
+
+
+def normalize(chunk):
+    """Coerce a raw chunk to the store's columns, filling numbers from unit strings."""
+    chunk = chunk[chunk['Serial_No'].notna()]
+    frame = pd.DataFrame(index=chunk.index)
+    frame['Serial_No'] = chunk['Serial_No'].astype('int64')
+    for column in COLUMNS[1:]:
+        if column in chunk:
+            frame[column] = chunk[column]
+        else:
+            frame[column] = np.float32('nan') if column in UNIT_COLUMNS else None
+    for column, unit_column in UNIT_COLUMNS.items():
+        if unit_column in chunk:
+            frame[column] = frame[column].astype('float32').fillna(parse_units(chunk[unit_column]))
+    frame['Date'] = parse_dates(chunk['Date']) if 'Date' in chunk else NO_DATE
+    return frame
+
+
+def import_csv(path, store, progress=None, chunk_rows=CHUNK_ROWS):
+    """Replace the store's records with a fitness CSV, streamed in typed chunks.
+
+    Only the schema's columns are parsed. After each chunk `progress(rows,
+    fraction)` is called with the rows loaded so far and the share of the
+    file consumed. Returns the number of rows loaded. A missing file raises
+    FileNotFoundError before the store is touched.
+    """
+    size = os.path.getsize(path) or 1
+    rows = 0
+    with open(path, 'rb') as handle:
+        reader = pd.read_csv(handle, usecols=lambda column: column in SCHEMA, dtype=SCHEMA, chunksize=chunk_rows)
+        store.clear()
+        for chunk in reader:
+            frame = normalize(chunk)
+            store.extend(frame)
+            rows += len(frame)
+            if progress is not None:
+                progress(rows, min(1.0, handle.tell() / size))
+    return rows
+
+
+def export_csv(frame, path, progress=None, chunk_rows=CHUNK_ROWS):
+    """Write `frame` in chunks to a temporary file and move it over `path` when complete."""
+    temporary = f"{path}.tmp"
+    total = len(frame)
+    frame.iloc[:0].to_csv(temporary, index=False, columns=COLUMNS)
+    for start in range(0, total, chunk_rows):
+        frame.iloc[start:start + chunk_rows].to_csv(temporary, mode='a', header=False, index=False, columns=COLUMNS)
+        if progress is not None:
+            progress(min(total, start + chunk_rows), min(1.0, (start + chunk_rows) / total))
+    os.replace(temporary, path)
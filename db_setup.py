@@ -1,55 +1,359 @@
-import mysql.connector
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
 
 pas = "root"
 
+DB_BACKEND = "mysql"  # "mysql", or "sqlite" to run locally without a MySQL server
+SQLITE_PATH = "fitapp.db"
+POOL_SIZE = 5
+POOL_TIMEOUT = 10  # Seconds to wait for a free connection
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": pas,
+    "database": "fitapp",
+}
+
+
+# ---------------- Backends ---------------- #
+
+class MySQLBackend:
+    """MySQL server through mysql.connector, with prepared-statement cursors."""
+
+    name = "mysql"
+    auto_id = "INT AUTO_INCREMENT PRIMARY KEY"
+
+    def connect(self, database=True):
+        import mysql.connector
+
+        config = dict(DB_CONFIG)
+        if not database:
+            config.pop("database")
+        return mysql.connector.connect(**config)
+
+    def is_healthy(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def cursor(self, conn):
+        return conn.cursor(prepared=True)
+
+    def sql(self, statement):
+        return statement
+
+    def upsert(self, key, columns):
+        """Clause turning an INSERT into an update when `key` already exists."""
+        return "ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in columns)
+
+    def widen(self, table, column, definition):
+        """Statement changing an existing column's type."""
+        return f"ALTER TABLE {table} MODIFY {column} {definition}"
+
+
+class SQLiteBackend:
+    """Local SQLite file; sqlite3 caches the compiled statements per connection."""
+
+    name = "sqlite"
+    auto_id = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def __init__(self, path=None):
+        self.path = path or SQLITE_PATH
+
+    def connect(self, database=True):
+        # Pooled connections may be used from worker threads, one at a time
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def cursor(self, conn):
+        return conn.cursor()
+
+    def sql(self, statement):
+        # Queries are written with MySQL-style %s placeholders
+        return statement.replace("%s", "?")
+
+    def upsert(self, key, columns):
+        """Clause turning an INSERT into an update when `key` already exists."""
+        return f"ON CONFLICT ({key}) DO UPDATE SET " + ", ".join(f"{column} = excluded.{column}" for column in columns)
+
+    def widen(self, table, column, definition):
+        """SQLite does not enforce VARCHAR lengths, so nothing needs changing."""
+        return None
+
+
+BACKENDS = {"mysql": MySQLBackend, "sqlite": SQLiteBackend}
+
+
+# ---------------- Connection Pool ---------------- #
+
+class ConnectionPool:
+    """Fixed-size pool of database connections with health checks on checkout."""
+
+    def __init__(self, backend, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.backend = backend
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Check out a healthy connection, opening one if the pool is not full yet."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open_or_wait()
+            if self.backend.is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def _open_or_wait(self):
+        with self._lock:
+            can_open = self._created < self.size
+            if can_open:
+                self._created += 1
+        if not can_open:
+            try:
+                return self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No database connection became free within {self.timeout}s.") from None
+        try:
+            return self.backend.connect()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def release(self, conn):
+        """Return a connection to the pool, dropping anything left uncommitted."""
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(backend=None, pool_size=None, sqlite_path=None):
+    """Choose the backend and pool size; the next get_pool() call builds a fresh pool."""
+    global DB_BACKEND, POOL_SIZE, SQLITE_PATH, _pool
+    with _pool_lock:
+        if backend is not None:
+            DB_BACKEND = backend
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if sqlite_path is not None:
+            SQLITE_PATH = sqlite_path
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+
+
+def get_pool():
+    """The shared connection pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(BACKENDS[DB_BACKEND](), size=POOL_SIZE)
+        return _pool
+
+
+# ---------------- Data Access ---------------- #
+
+@contextmanager
+def db_cursor(commit=False):
+    """Yield a cursor on a pooled connection.
+
+    Statements use %s placeholders on every backend. With commit=True the
+    transaction is committed when the block exits normally; on an exception
+    it is rolled back.
+    """
+    pool = get_pool()
+    with pool.connection() as conn:
+        cursor = pool.backend.cursor(conn)
+        try:
+            yield _Cursor(cursor, pool.backend)
+            if commit:
+                conn.commit()
+        finally:
+            cursor.close()
+
+
+class _Cursor:
+    """Thin cursor wrapper that adapts placeholders to the backend."""
+
+    def __init__(self, cursor, backend):
+        self._cursor = cursor
+        self._backend = backend
+
+    def execute(self, statement, params=()):
+        self._cursor.execute(self._backend.sql(statement), params)
+        return self
+
+    def executemany(self, statement, rows):
+        self._cursor.executemany(self._backend.sql(statement), rows)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+
+def fetch_one(statement, params=()):
+    with db_cursor() as cursor:
+        return cursor.execute(statement, params).fetchone()
+
+
+def fetch_all(statement, params=()):
+    with db_cursor() as cursor:
+        return cursor.execute(statement, params).fetchall()
+
+
+def execute(statement, params=()):
+    """Run one statement in its own transaction and return the affected row count."""
+    with db_cursor(commit=True) as cursor:
+        return cursor.execute(statement, params).rowcount
+
+
 def connect_db():
-    # return mysql.connector.connect(**DB_CONFIG)
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password=pas,
-        database="fitapp"
-    )
+    """Open a new, unpooled connection to the fitapp database."""
+    return BACKENDS[DB_BACKEND]().connect()
+
+
+# ---------------- Schema ---------------- #
 
 def setup_database():
     try:
-        db = connect_db()
-        cursor = db.cursor()
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            username VARCHAR(50) UNIQUE NOT NULL,
-            password VARCHAR(50) NOT NULL
-        );
-        """)
+        backend = get_pool().backend
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS users (
+                id {backend.auto_id},
+                username VARCHAR(50) UNIQUE NOT NULL,
+                password VARCHAR(255) NOT NULL
+            );
+            """)
+            # Older tables were made for plaintext passwords of up to 50 characters
+            widen = backend.widen("users", "password", "VARCHAR(255) NOT NULL")
+            if widen:
+                cursor.execute(widen)
 
         print("users table created succefully.")
 
-        # cursor.execute("""
-        # CREATE TABLE IF NOT EXISTS fitness_tracker (
-        #     id INT AUTO_INCREMENT PRIMARY KEY,
-        #     ,
-        #     field2 VARCHAR(100)
-        # );
-        # """)
-
-        # print("data_table table created succefully.")
-        
-        db.commit()
-        db.close()
+        # Per-user workout log; the (user_id, serial_no) key serves the keyset paging in fitness_db
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS workouts (
+                id {backend.auto_id},
+                user_id INT NOT NULL,
+                serial_no INT NOT NULL,
+                date DATE NULL,
+                day VARCHAR(20),
+                weight DOUBLE,
+                split VARCHAR(50),
+                calories DOUBLE,
+                UNIQUE (user_id, serial_no)
+            );
+            """)
+
+        print("workouts table created succefully.")
     except Exception as e:
         print(f"Database setup failed: {e}")
 
 
 def create_database():
-    mydb = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password=pas
-    )
-    mycursor = mydb.cursor()
-    mycursor.execute("CREATE DATABASE IF NOT EXISTS fitapp;")
-    print("Database created successfully")
+    if DB_BACKEND == "mysql":
+        # The server-level connection is only needed once, so it bypasses the pool
+        mydb = MySQLBackend().connect(database=False)
+        mycursor = mydb.cursor()
+        mycursor.execute("CREATE DATABASE IF NOT EXISTS fitapp;")
+        print("Database created successfully")
+        mydb.commit()
+        mydb.close()
     setup_database()
-    mydb.commit()
-    mydb.close()
+
+
+# ---------------- Bootstrap ---------------- #
+
+_bootstrap = None
+_bootstrap_error = None
+
+
+def start_bootstrap():
+    """Run create_database() on a background thread so the first window need not wait for it."""
+    global _bootstrap
+
+    def bootstrap():
+        global _bootstrap_error
+        try:
+            create_database()
+        except Exception as e:
+            _bootstrap_error = e
+
+    _bootstrap = threading.Thread(target=bootstrap, name="db-bootstrap", daemon=True)
+    _bootstrap.start()
+
+
+def wait_for_database(timeout=POOL_TIMEOUT):
+    """Block until a started bootstrap has finished, re-raising its error.
+
+    Returns at once if start_bootstrap() was never called. Meant for worker
+    threads, not the Tk thread.
+    """
+    if _bootstrap is None:
+        return
+    _bootstrap.join(timeout)
+    if _bootstrap.is_alive():
+        raise TimeoutError("The database is still being set up.")
+    if _bootstrap_error is not None:
+        raise _bootstrap_error
@@ -0,0 +1,368 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregates import AggregateEngine
+from bulk_entry import SERIAL_LIMIT, validate
+from fitness_db import DirtyTracker, WorkoutRepository
+from journal import COMPACT_EVENTS, Journal
+from record_store import FitnessRecordStore, to_date
+from search_index import FitnessSearchIndex
+from sessions import user_dir
+from sort_cache import SortCache
+from storage import DEFAULT_PATH, MemoryMappedStorage, migrate_csv, open_storage, snapshot
+from timeseries import FitnessTimeSeries
+
+DATA_FILE = 'fitness.csv'  # Legacy CSV log, migrated into the storage backend on first load
+
+
+class FitnessEngine:
+    """The fitness log without any UI: records, search, statistics and persistence.
+
+    Without a user id the log is kept in a local storage backend (memory-mapped
+    columns by default) plus a journal of unsaved changes; with one it lives
+    in the workouts table, with a local copy for quick starts. Both Tk apps
+    drive an engine, and scripts can use one directly:
+
+        engine = FitnessEngine()
+        engine.load()
+        engine.add(1, "Monday", 70.5, "Legs", 2500, date="2024-03-04")
+        engine.save()
+        engine.close()
+
+    Changes must all come from one thread. read() and the write step of
+    prepare_save() may run on a worker (see tasks.TaskScheduler); their
+    `task` argument is optional outside of one. search() may too, given a
+    view of the store taken on the owning thread.
+    """
+
+    def __init__(self, user_id=None, storage=None, data_file=DATA_FILE):
+        self.user_id = user_id
+        self.data_file = data_file
+        self.store = FitnessRecordStore()
+        self.search_index = FitnessSearchIndex(self.store)
+        self._search_lock = threading.Lock()
+        self.message = None  # Status of the last load
+        self._aggregates = None
+        self._timeseries = None
+        self._sorting = None
+        if user_id is None:
+            self.storage = storage if storage is not None else open_storage(DEFAULT_PATH)
+            self.journal = Journal(self.store, self.storage)
+            self.repository = self.dirty = self.cache = None
+        else:
+            self.storage = self.journal = None
+            self.repository = WorkoutRepository(user_id)
+            self.dirty = DirtyTracker(self.store)
+            self.cache = MemoryMappedStorage(os.path.join(user_dir(user_id), 'workouts'))
+
+    def __len__(self):
+        return len(self.store)
+
+    # ---------------- Records ---------------- #
+
+    def frame(self):
+        """DataFrame of the live records, indexed by row id (see FitnessRecordStore.frame)."""
+        return self.store.frame()
+
+    def add(self, serial_no, day, weight, exercise_split, diet, date=None):
+        """Add one entry from raw (e.g. typed-in) values and return its row id.
+
+        The date is optional ("YYYY-MM-DD"); with one, a blank day is filled
+        in from it. Raises ValueError if Serial No., Weight or Diet is not a
+        number, the Serial No. is out of range (see bulk_entry.SERIAL_LIMIT)
+        or the date is malformed, and KeyError if the Serial No. already
+        exists.
+        """
+        serial_no = int(serial_no)
+        if not -SERIAL_LIMIT <= serial_no < SERIAL_LIMIT:
+            raise ValueError(f"Serial No. is out of range (±{SERIAL_LIMIT:,})")
+        date = to_date(date)
+        if not day and not np.isnat(date):
+            day = pd.Timestamp(date).day_name()
+        return self.store.append(serial_no, day, float(weight), exercise_split, float(diet), date)
+
+    def validate_rows(self, raw):
+        """Check a batch of raw rows (see bulk_entry.parse_text/read_file); returns (rows, problems).
+
+        See bulk_entry.validate: `rows` are the valid ones for add_rows(),
+        `problems` says what is wrong with each of the others.
+        """
+        return validate(raw, self.store)
+
+    def add_rows(self, rows):
+        """Add a batch of validated rows in one store update and return how many were added.
+
+        Raises KeyError, adding nothing, if a Serial No. was taken since the rows were validated.
+        """
+        taken = self.store.contains(rows['Serial_No'])
+        if taken.any():
+            raise KeyError(f"Serial No. {rows['Serial_No'].to_numpy()[taken][0]} already exists.")
+        self.store.extend(rows)
+        return len(rows)
+
+    def delete(self, row_id):
+        """Delete the entry with the given row id and return it (see FitnessRecordStore.records)."""
+        return self.store.delete_row(int(row_id))
+
+    def delete_rows(self, row_ids):
+        """Delete the entries with the given row ids (e.g. Treeview item ids) in one update; returns their count.
+
+        Raises KeyError, deleting nothing, if one of them is not a current entry.
+        """
+        return len(self.store.delete_rows([int(row_id) for row_id in row_ids])['row_id'])
+
+    def edit_rows(self, row_ids, day='', weight='', exercise_split='', diet='', date=''):
+        """Give several entries the same new values in one update; blank values are left as they are.
+
+        Values are raw like add()'s; with a new date and no day, the day is
+        taken from the date. The entries keep their row ids and place in
+        the log; their row ids are returned. Raises ValueError for malformed
+        (or no) values and KeyError if a row id is not a current entry;
+        either way nothing is changed.
+        """
+        changes = {}
+        if str(date).strip():
+            changes['Date'] = to_date(str(date).strip())
+            if not day:
+                day = pd.Timestamp(changes['Date']).day_name()
+        if day:
+            changes['Day'] = str(day)
+        if weight:
+            changes['Weight (kg)'] = float(weight)
+        if exercise_split:
+            changes['Exercise_Split'] = str(exercise_split)
+        if diet:
+            changes['Diet (Calories)'] = float(diet)
+        if not changes:
+            raise ValueError("No new values given.")
+        return self.store.update_rows([int(row_id) for row_id in row_ids], changes)
+
+    def search(self, query, view=None):
+        """Entries matching a search query (see FitnessSearchIndex), or None for a blank query.
+
+        With a `view` of the store (see FitnessRecordStore.view) the search
+        reads that instead, so it can run on a worker while the store
+        changes; the index is shared and searches take turns.
+        """
+        if not query.strip():
+            return None
+        with self._search_lock:
+            self.search_index.store = view if view is not None else self.store.view()
+            return self.search_index.search(query)
+
+    @property
+    def sorting(self):
+        """Cached sort orders of the columns, for sorted views of the log; set up on first use."""
+        if self._sorting is None:
+            self._sorting = SortCache(self.store)
+        return self._sorting
+
+    def sort_order(self, keys, row_ids=None):
+        """Positions that sort frame() (or the rows with the given row ids) by (column, ascending) keys.
+
+        See SortCache.order; returns None if `row_ids` are not all current entries.
+        """
+        return self.sorting.order(keys, row_ids)
+
+    # ---------------- Statistics ---------------- #
+
+    @property
+    def timeseries(self):
+        """The dated entries in date order, for date ranges and resampling; set up on first use."""
+        if self._timeseries is None:
+            self._timeseries = FitnessTimeSeries(self.store)
+        return self._timeseries
+
+    def trend(self, period=None):
+        """Weight and calories to chart: by date once every entry is dated, else by row id.
+
+        With a period ('day', 'week', 'month' or 'year') the entries are
+        averaged per period (see FitnessTimeSeries.resample). Until all of
+        them have dates the chart stays by entry, so that a few dated
+        entries do not hide an undated log.
+        """
+        timeseries = self.timeseries
+        if not len(timeseries) or len(timeseries) < len(self.store):
+            return self.frame()[['Weight (kg)', 'Diet (Calories)']]
+        return timeseries.series() if period is None else timeseries.resample(period)
+
+    @property
+    def aggregates(self):
+        """Incrementally maintained metrics, set up on first use."""
+        if self._aggregates is None:
+            self._aggregates = AggregateEngine(self.store, self.timeseries)
+        return self._aggregates
+
+    def stats(self):
+        """Summary metrics as a dict; values are None when there is nothing to average."""
+        aggregates = self.aggregates
+        stats = {'entries': len(self.store)}
+        stats.update({name: aggregates.value(name) for name in aggregates.metrics})
+        stats['weight_std'] = aggregates.weight.std()
+        return stats
+
+    # ---------------- Loading ---------------- #
+
+    def read(self, task=None, cached=False):
+        """Read the saved log into a fresh store; returns (store, message, replayed) for adopt().
+
+        Reads the data file plus the journal, or the user's workouts from
+        the database (their local copy with cached=True, if there is one);
+        `replayed` is the number of journal lines applied. On a worker, the
+        task's progress reports carry a view of the records read so far
+        (see FitnessRecordStore.view). Call flush() on the owning thread first. Only the fresh store is changed, so this
+        may run on a worker. Raises FileNotFoundError when nothing has been
+        saved yet.
+        """
+        store = FitnessRecordStore()
+        replayed = 0
+        if self.repository is None:
+            message, replayed = self._read_local(store, task)
+        elif cached and self.cache.exists():
+            self.cache.load(store, progress=_progress(task, store))
+            message = "Cached data loaded; Load Data fetches the latest from the database."
+        else:
+            self._read_database(store, task)
+            message = "Data loaded successfully!"
+        return store, message, replayed
+
+    def _read_local(self, store, task):
+        self.journal.wait()
+        message = "Data loaded successfully!"
+        if migrate_csv(self.storage, store, self.data_file, progress=_progress(task, store)):
+            message = f"Migrated {self.data_file} to {self.storage.path}"
+        elif self.storage.exists() or not self.journal.pending():
+            self.storage.load(store, progress=_progress(task, store))
+        _check(task)
+        recovered = self.journal.replay(store)
+        if recovered:
+            message += f" Replayed {recovered} journaled changes."
+        return message, recovered
+
+    def _read_database(self, store, task):
+        total = max(1, self.repository.count())
+        for page in self.repository.iter_pages():
+            store.extend(page)
+            if task is not None:
+                task.progress(len(store), min(1.0, len(store) / total), store.view())
+        self.update_cache(store)
+
+    def adopt(self, store, message=None, replayed=0):
+        """Make a store from read() the engine's records, without logging it as changes.
+
+        The `replayed` journal lines are in the records but not yet in the
+        data file, so they count towards the next compaction.
+        """
+        arrays, categories = store.export_columns()
+        tracker = self.dirty if self.dirty is not None else self.journal
+        with tracker.suspend():
+            self.store.adopt(arrays, categories)
+        if self.dirty is not None:
+            self.dirty.reset()
+        else:
+            self.journal.events = replayed
+        self.message = message
+        return message
+
+    def load(self, task=None, cached=False):
+        """flush(), read() and adopt() in one go; returns the status message."""
+        self.flush()
+        return self.adopt(*self.read(task, cached))
+
+    # ---------------- Saving ---------------- #
+
+    def has_changes(self):
+        if self.repository is not None:
+            return bool(self.dirty)
+        return bool(self.journal.events or self.journal.pending())
+
+    def prepare_save(self):
+        """Start saving the changes; returns (write, failed), or None if there are none.
+
+        Call it on the thread that changes the store. write(task) does the
+        slow part and may run on a worker; if it raises, failed(error) keeps
+        the changes for the next save. Local changes are already journaled:
+        they are synced and compacted in the background here, and write has
+        nothing left to do.
+        """
+        if not self.has_changes():
+            return None
+        if self.repository is None:
+            self.journal.sync()
+            self.journal.compact()
+            return (lambda task: len(self.store)), (lambda error: None)
+
+        changes = self.dirty.take()
+        copy = snapshot(self.store)
+
+        def write(task):
+            self.repository.save(*changes)
+            self.update_cache(copy)
+            return len(changes[0]) + len(changes[1])
+
+        def failed(error):
+            self.dirty.restore(*changes)
+
+        return write, failed
+
+    def save(self):
+        """Save the changes on this thread; returns the number of entries written, None if there were no changes."""
+        prepared = self.prepare_save()
+        if prepared is None:
+            return None
+        write, failed = prepared
+        try:
+            return write(None)
+        except Exception as e:
+            failed(e)
+            raise
+
+    def flush(self):
+        """Sync journaled changes to disk, where read() picks them up."""
+        if self.journal is not None:
+            self.journal.sync()
+
+    def autosave(self, compact=True):
+        """Sync journaled changes to disk, compacting a long journal.
+
+        Call it periodically, with compact=False while a read() is under
+        way, since a compaction then would write the store read() is about
+        to replace. Returns the error of a background compaction that
+        failed since the last call, if any.
+        """
+        if self.journal is None:
+            return None
+        self.flush()
+        if compact and self.journal.events >= COMPACT_EVENTS:
+            self.journal.compact()
+        error, self.journal.error = self.journal.error, None
+        return error
+
+    def update_cache(self, store):
+        """Replace the user's local copy with a store that no other thread is changing."""
+        try:
+            self.cache.save(store)
+        except OSError as e:
+            # The database has the data; a stale copy is only refreshed later
+            print(f"Could not update the local copy of user {self.user_id}'s data: {e}")
+
+    def close(self):
+        """Flush the journal and let a running compaction finish."""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal.wait()
+
+
+def _progress(task, store):
+    """Progress callback for a read into `store`, passing a view of the records read so far along."""
+    if task is None:
+        return None
+    return lambda rows, fraction: task.progress(rows, fraction, store.view())
+
+
+def _check(task):
+    if task is not None:
+        task.check()
@@ -1,18 +1,44 @@
 import tkinter as tk
+from datetime import date
 from tkinter import ttk, messagebox
-import pandas as pd
 import matplotlib.pyplot as plt
+import numpy as np
+from bulk_dialog import BulkEditDialog, BulkEntryDialog
+from bulk_entry import SERIAL_LIMIT
+from engine import FitnessEngine
+from live_search import LiveSearch
+from lod import LodCache, LodLine, date_axis, follow_view, plot_x
+from sessions import end_session, load_profile
+from tasks import TaskCancelled, TaskScheduler
+from virtual_table import VirtualTable, sort_order
+
+AUTOSAVE_MS = 2000  # How often journaled changes are synced to disk
+PLOT_PERIODS = {'Entry': None, 'Week': 'week', 'Month': 'month'}  # "Plot by" choice -> resampling period
+
 
 class FitnessApp:
-    def __init__(self, root):
+    def __init__(self, root, user_id=None, storage=None):
         # self.root = root
         self.root = tk.Tk()
         self.root.title("Enhanced Fitness Data Tracker")
-        self.root.geometry("900x700")  # Set a fixed window size
-
-        # Initialize an empty DataFrame for fitness data
-        self.data_file = 'fitness.csv'
-        self.data = pd.DataFrame(columns=['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'])
+        self.user_id = user_id
+        profile = load_profile(user_id) if user_id is not None else None
+        if profile is not None:
+            self.root.title(f"Enhanced Fitness Data Tracker - {profile['username']}")
+        self.root.geometry("1000x700")  # Set a fixed window size
+
+        # The records, search and persistence live in a FitnessEngine; self.data is the
+        # store's DataFrame view
+        self.engine = FitnessEngine(user_id, storage)
+        self.store = self.engine.store
+        self.lod_cache = LodCache()
+        self.data = self.store.frame()
+        self.root.after(AUTOSAVE_MS, self.autosave)
+
+        # Loading, saving and plot preparation run on worker threads; anything that
+        # changes the store waits for the 'store' tasks ahead of it
+        self.tasks = TaskScheduler(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
         # Setup GUI Layout
         self.setup_gui()
@@ -48,55 +74,67 @@ class FitnessApp:
         self.entry_serial = ttk.Entry(input_frame, width=20)
         self.entry_serial.grid(row=0, column=1, padx=5, pady=5)
 
-        ttk.Label(input_frame, text="Day").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(input_frame, text="Date (YYYY-MM-DD)").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        self.entry_date = ttk.Entry(input_frame, width=20)
+        self.entry_date.insert(0, date.today().isoformat())
+        self.entry_date.grid(row=1, column=1, padx=5, pady=5)
+
+        ttk.Label(input_frame, text="Day").grid(row=2, column=0, padx=5, pady=5, sticky="w")
         self.entry_day = ttk.Entry(input_frame, width=20)
-        self.entry_day.grid(row=1, column=1, padx=5, pady=5)
+        self.entry_day.grid(row=2, column=1, padx=5, pady=5)
 
-        ttk.Label(input_frame, text="Weight (kg)").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(input_frame, text="Weight (kg)").grid(row=3, column=0, padx=5, pady=5, sticky="w")
         self.entry_weight = ttk.Entry(input_frame, width=20)
-        self.entry_weight.grid(row=2, column=1, padx=5, pady=5)
+        self.entry_weight.grid(row=3, column=1, padx=5, pady=5)
 
-        ttk.Label(input_frame, text="Exercise Split").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(input_frame, text="Exercise Split").grid(row=4, column=0, padx=5, pady=5, sticky="w")
         self.entry_exercise = ttk.Entry(input_frame, width=20)
-        self.entry_exercise.grid(row=3, column=1, padx=5, pady=5)
+        self.entry_exercise.grid(row=4, column=1, padx=5, pady=5)
 
-        ttk.Label(input_frame, text="Diet (Calories)").grid(row=4, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(input_frame, text="Diet (Calories)").grid(row=5, column=0, padx=5, pady=5, sticky="w")
         self.entry_diet = ttk.Entry(input_frame, width=20)
-        self.entry_diet.grid(row=4, column=1, padx=5, pady=5)
+        self.entry_diet.grid(row=5, column=1, padx=5, pady=5)
 
         # Search Bar
-        ttk.Label(input_frame, text="Search:").grid(row=5, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(input_frame, text="Search:").grid(row=6, column=0, padx=5, pady=5, sticky="w")
         self.search_entry = ttk.Entry(input_frame, width=20)
-        self.search_entry.grid(row=5, column=1, padx=5, pady=5)
+        self.search_entry.grid(row=6, column=1, padx=5, pady=5)
+        self.live_search = LiveSearch(self.search_entry, self.store, self.find_rows, self.show_search_results, self.show_search_error)
+
+        # Chart granularity: every entry, or weekly/monthly averages of the dated ones
+        ttk.Label(input_frame, text="Plot by:").grid(row=7, column=0, padx=5, pady=5, sticky="w")
+        self.plot_period = ttk.Combobox(input_frame, values=list(PLOT_PERIODS), state="readonly", width=17)
+        self.plot_period.set('Entry')
+        self.plot_period.grid(row=7, column=1, padx=5, pady=5)
 
         # Buttons
         ttk.Button(button_frame, text="Add Data", command=self.add_data).grid(row=0, column=0, padx=5, pady=5)
-        ttk.Button(button_frame, text="Search", command=self.search_data).grid(row=0, column=1, padx=5, pady=5)
-        ttk.Button(button_frame, text="Delete Row", command=self.delete_row).grid(row=0, column=2, padx=5, pady=5)
-        ttk.Button(button_frame, text="Plot Data", command=self.plot_data).grid(row=0, column=3, padx=5, pady=5)
-        ttk.Button(button_frame, text="Save Data", command=self.save_data).grid(row=0, column=4, padx=5, pady=5)
-        ttk.Button(button_frame, text="Load Data", command=self.load_data).grid(row=0, column=5, padx=5, pady=5)
+        ttk.Button(button_frame, text="Bulk Add", command=self.open_bulk_entry).grid(row=0, column=1, padx=5, pady=5)
+        ttk.Button(button_frame, text="Search", command=self.search_data).grid(row=0, column=2, padx=5, pady=5)
+        ttk.Button(button_frame, text="Delete Rows", command=self.delete_row).grid(row=0, column=3, padx=5, pady=5)
+        ttk.Button(button_frame, text="Edit Rows", command=self.edit_rows).grid(row=0, column=4, padx=5, pady=5)
+        ttk.Button(button_frame, text="Plot Data", command=self.plot_data).grid(row=0, column=5, padx=5, pady=5)
+        ttk.Button(button_frame, text="Save Data", command=self.save_data).grid(row=0, column=6, padx=5, pady=5)
+        ttk.Button(button_frame, text="Load Data", command=self.load_data).grid(row=0, column=7, padx=5, pady=5)
+        if self.user_id is not None:
+            ttk.Button(button_frame, text="Log Out", command=self.log_out).grid(row=0, column=8, padx=5, pady=5)
 
         # Message Label
         self.message_label = ttk.Label(self.root, text="", style="Success.TLabel")
         self.message_label.grid(row=3, column=0, columnspan=2, padx=10, pady=5)
+        self.message_label.bind("<Button-1>", lambda event: self.cancel_tasks())
 
-        # Treeview Table
-        self.tree = ttk.Treeview(tree_frame, columns=['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'], show='headings', height=10)
+        # Treeview Table (virtualized: only the rows in view are materialized)
+        self.table = VirtualTable(tree_frame, ['Serial_No', 'Date', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'], height=10,
+                                  sorter=self.sort_rows)
+        self.tree = self.table.tree
         self.tree.grid(row=0, column=0, columnspan=5, padx=5, pady=5)
 
-        # Add column headers to the Treeview
-        for col in ['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)']:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=150)
-
         # Add a scrollbar for the Treeview
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
-        scrollbar.grid(row=0, column=5, sticky="ns")
+        self.table.scrollbar.grid(row=0, column=5, sticky="ns")
 
-        # Load Initial Data
-        self.load_data()
+        # Load Initial Data in the background, behind the window
+        self.load_data(cached=True)
 
         # Configure Grid Weights for resizing
         self.root.grid_rowconfigure(2, weight=1)  # Make the Treeview's row expandable
@@ -109,102 +147,193 @@ class FitnessApp:
         style_name = "Success.TLabel" if success else "Error.TLabel"
         self.message_label.config(text=message, style=style_name)
 
+    def when_store_ready(self, action, *args):
+        """Run a store change now, or once the load/save in progress has finished."""
+        if self.tasks.busy('store'):
+            self.update_status("Waiting for the current task to finish...", success=True)
+        self.tasks.serialize('store', lambda: action(*args))
+
     def add_data(self):
         """Add user input to the DataFrame."""
         serial_no = self.entry_serial.get()
+        entry_date = self.entry_date.get().strip()
         day = self.entry_day.get()
         weight = self.entry_weight.get()
         exercise_split = self.entry_exercise.get()
         diet = self.entry_diet.get()
 
-        if not serial_no or not day or not weight or not exercise_split or not diet:
+        # The day can be left out when the date is given
+        if not serial_no or not (day or entry_date) or not weight or not exercise_split or not diet:
             self.update_status("Please fill all fields", success=False)
             return
+        self.when_store_ready(self.append_record, serial_no, day, weight, exercise_split, diet, entry_date)
 
+    def append_record(self, serial_no, day, weight, exercise_split, diet, entry_date=None):
+        self.live_search.cancel()
         try:
-            weight = float(weight)
-            diet = float(diet)
-            new_data = pd.DataFrame([[serial_no, day, weight, exercise_split, diet]],
-                                    columns=['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'])
-            self.data = pd.concat([self.data, new_data], ignore_index=True)
-            self.update_table()
-            self.update_status(f"Data added successfully! Total Entries: {self.data.shape[0]}", success=True)
+            self.engine.add(serial_no, day, weight, exercise_split, diet, entry_date)
         except ValueError:
-            self.update_status("Invalid data: Weight and Diet must be numbers.", success=False)
+            self.update_status(f"Invalid data: Serial No. must be a whole number within ±{SERIAL_LIMIT:,}, "
+                               "Weight and Diet numbers and Date YYYY-MM-DD.", success=False)
+            return
+        except KeyError:
+            self.update_status(f"Serial No. {serial_no} already exists.", success=False)
+            return
+
+        self.data = self.store.frame()
+        self.update_table()
+        self.update_status(f"Data added successfully! Total Entries: {self.data.shape[0]}", success=True)
+
+    def open_bulk_entry(self):
+        """Open the window for pasting or importing many entries at once."""
+        BulkEntryDialog(self.root, self.engine,
+                        lambda rows, report: self.when_store_ready(self.append_records, rows, report))
+
+    def append_records(self, rows, report):
+        """Add a validated batch in one store update, then refresh the table once."""
+        self.live_search.cancel()
+        try:
+            added = self.engine.add_rows(rows)
+        except KeyError as e:
+            self.update_status(f"Bulk add failed: {e.args[0]}", success=False)
+            report(0, e.args[0])
+            return
+        report(added)
+
+        self.data = self.store.frame()
+        self.update_table()
+        self.update_status(f"Added {added} entries. Total Entries: {self.data.shape[0]}", success=True)
 
     def delete_row(self):
-        """Delete selected row from the Treeview and DataFrame."""
-        selected_item = self.tree.selection()
-        if not selected_item:
+        """Delete the selected rows from the store in one update."""
+        selected = self.table.selection()
+        if not selected:
             self.update_status("No row selected to delete.", success=False)
             return
+        if len(selected) > 1 and not messagebox.askyesno("Delete Rows", f"Delete the {len(selected)} selected rows?"):
+            return
+        self.when_store_ready(self.remove_records, selected)
 
+    def remove_records(self, items):
         try:
-            # Get the selected row values
-            row_values = self.tree.item(selected_item, 'values')
-            serial_no_to_delete = row_values[0]
+            # Treeview item ids are the records' stable row ids in the store
+            self.live_search.cancel()
+            deleted = self.engine.delete_rows(items)
+            self.data = self.store.frame()
 
-            # Remove from DataFrame
-            self.data = self.data[self.data['Serial_No'] != serial_no_to_delete].reset_index(drop=True)
-
-            # Remove from Treeview
-            self.tree.delete(selected_item)
+            # Refresh the visible window of the Treeview
+            self.update_table()
 
-            self.update_status("Row deleted successfully.", success=True)
+            self.update_status("Row deleted successfully." if deleted == 1 else f"Deleted {deleted} rows.",
+                               success=True)
         except Exception as e:
-            self.update_status(f"Error deleting row: {e}", success=False)
+            self.update_status(f"Error deleting rows: {e}", success=False)
+
+    def edit_rows(self):
+        """Give the selected rows new values (see BulkEditDialog)."""
+        selected = self.table.selection()
+        if not selected:
+            self.update_status("No rows selected to edit.", success=False)
+            return
+        BulkEditDialog(self.root, len(selected),
+                       lambda changes: self.when_store_ready(self.update_records, selected, changes))
+
+    def update_records(self, items, changes):
+        self.live_search.cancel()
+        try:
+            row_ids = self.engine.edit_rows(items, **changes)
+        except ValueError:
+            self.update_status("Invalid data: Weight and Diet must be numbers and Date YYYY-MM-DD.", success=False)
+            return
+        except KeyError as e:
+            self.update_status(f"Error editing rows: {e.args[0]}", success=False)
+            return
+
+        self.data = self.store.frame()
+        self.update_table()
+        self.update_status(f"Updated {len(row_ids)} rows.", success=True)
 
     def search_data(self):
-        """Filter the Treeview based on the search query."""
-        query = self.search_entry.get().lower()
-        if not query:
+        """Run the search query now instead of waiting for the typing debounce."""
+        self.live_search.run_now()
+
+    def find_rows(self, query, view):
+        """Search a view of the store (called on the live search's worker once typing pauses)."""
+        return self.engine.search(query, view)
+
+    def show_search_results(self, query, filtered_data):
+        """Filter the Treeview with the rows found by the live search."""
+        if filtered_data is None:
             self.update_table()
             self.update_status("Search cleared. Showing all entries.", success=True)
             return
 
-        filtered_data = self.data[
-            self.data.apply(lambda row: query in str(row['Serial_No']).lower()
-                                        or query in str(row['Day']).lower()
-                                        or query in str(row['Weight (kg)']).lower()
-                                        or query in str(row['Exercise_Split']).lower()
-                                        or query in str(row['Diet (Calories)']).lower(), axis=1)
-        ]
-
+        self.table.set_data(filtered_data)
         if filtered_data.empty:
             self.update_status("No matching records found.", success=False)
-            self.tree.delete(*self.tree.get_children())  # Clear Treeview
         else:
-            self.tree.delete(*self.tree.get_children())  # Clear Treeview
-            for _, row in filtered_data.iterrows():
-                reordered_row = [row['Serial_No'], row['Day'], row['Weight (kg)'], row['Exercise_Split'], row['Diet (Calories)']]
-            self.tree.insert("", "end", values=reordered_row)
             self.update_status(f"Showing {len(filtered_data)} matching records.", success=True)
 
+    def show_search_error(self, query, error):
+        """Report a query the search index rejected."""
+        self.update_status(f"Invalid search: {error}", success=False)
+
     def plot_data(self):
-        """Enhanced line plot for weight and diet trends."""
-        if self.data.empty:
+        """Enhanced line plot for weight and diet trends, against the dates once every entry has one."""
+        period = PLOT_PERIODS[self.plot_period.get()]
+        data = self.engine.trend(period)
+        if data.empty:
             self.update_status("No data to plot", success=False)
             return
 
+        self.update_status("Preparing plot...", success=True)
+        # One plot at a time: the LOD cache is not shared between workers
+        self.tasks.submit("Plotting", self.prepare_plot, data, self.store.version, period, key='plot',
+                          on_done=self.show_plot, on_error=self.show_task_error("plotting"))
+
+    def prepare_plot(self, task, data, version, period):
+        """Build the LOD pyramids and find the min/max weights (runs on a worker)."""
+        pyramids = {column: self.lod_cache.pyramid(version, (column, period), data[column])
+                    for column in ('Weight (kg)', 'Diet (Calories)')}
+        task.check()
+        weights = data['Weight (kg)'].to_numpy(dtype=float)
+        return data, period, pyramids, np.nanargmin(weights), np.nanargmax(weights)
+
+    def show_plot(self, prepared):
+        data, period, pyramids, min_weight_pos, max_weight_pos = prepared
+        self.update_status("", success=True)
         plt.figure(figsize=(10, 6))
-
-        # Line Plots
-        plt.plot(self.data.index, self.data['Weight (kg)'], marker='o', label='Weight (kg)', color='#1f77b4', linewidth=2)
-        plt.plot(self.data.index, self.data['Diet (Calories)'], marker='x', label='Diet (Calories)', color='#ff7f0e', linewidth=2)
+        ax = plt.gca()
+
+        # Line Plots (min/max level-of-detail views, recomputed on zoom/pan)
+        x = plot_x(data.index)
+        dated = data.index.dtype.kind == 'M'
+        weight_line, = plt.plot([], [], marker='o', label='Weight (kg)', color='#1f77b4', linewidth=2)
+        calories_line, = plt.plot([], [], marker='x', label='Diet (Calories)', color='#ff7f0e', linewidth=2)
+        lod_lines = [
+            LodLine(line, x, data[column], pyramids[column])
+            for line, column in ((weight_line, 'Weight (kg)'), (calories_line, 'Diet (Calories)'))
+        ]
+        for lod_line in lod_lines:
+            lod_line.refresh(full=True)
+        date_axis(ax, dated)
+        ax.relim()
+        ax.autoscale_view()
+        follow_view(ax, lod_lines)
 
         # Adding Annotations for Min/Max
-        min_weight_idx = self.data['Weight (kg)'].idxmin()
-        max_weight_idx = self.data['Weight (kg)'].idxmax()
-        plt.annotate(f"Min: {self.data['Weight (kg)'][min_weight_idx]}",
-                     (min_weight_idx, self.data['Weight (kg)'][min_weight_idx]),
+        weights = data['Weight (kg)'].to_numpy()
+        plt.annotate(f"Min: {weights[min_weight_pos]:.1f}",
+                     (x[min_weight_pos], weights[min_weight_pos]),
                      textcoords="offset points", xytext=(-10, 10), ha='center', fontsize=10, color="blue")
-        plt.annotate(f"Max: {self.data['Weight (kg)'][max_weight_idx]}",
-                     (max_weight_idx, self.data['Weight (kg)'][max_weight_idx]),
+        plt.annotate(f"Max: {weights[max_weight_pos]:.1f}",
+                     (x[max_weight_pos], weights[max_weight_pos]),
                      textcoords="offset points", xytext=(-10, -15), ha='center', fontsize=10, color="red")
 
         # Title and Labels
-        plt.title(f"Fitness Trends ({len(self.data)} Entries)", fontsize=16, fontweight='bold')
-        plt.xlabel('Index', fontsize=12)
+        unit = f"{period.capitalize()}s" if period is not None and dated else "Entries"
+        plt.title(f"Fitness Trends ({len(data)} {unit})", fontsize=16, fontweight='bold')
+        plt.xlabel('Date' if dated else 'Index', fontsize=12)
         plt.ylabel('Values', fontsize=12)
 
         # Grid and Legend
@@ -215,29 +344,128 @@ class FitnessApp:
         plt.tight_layout()
         plt.show()
 
+    # ---------------- Background tasks ---------------- #
+
+    def show_progress(self, action):
+        """Progress callback for background reads/writes that reports to the status label."""
+        def progress(rows, fraction):
+            self.update_status(f"{action}... {rows} entries ({fraction:.0%}) - click to cancel", success=True)
+        return progress
+
+    def show_task_error(self, action):
+        """on_error callback reporting a failed or cancelled background task."""
+        def error(e):
+            if isinstance(e, TaskCancelled):
+                self.update_status(f"{action.capitalize()} cancelled.", success=False)
+            else:
+                self.update_status(f"Error {action} data: {e}", success=False)
+        return error
+
+    def cancel_tasks(self):
+        """Cancel the running background tasks (bound to clicks on the status label)."""
+        if self.tasks.busy():
+            self.tasks.cancel_all()
+            self.update_status("Cancelling...", success=False)
+
+    def log_out(self):
+        """Forget the saved session, so the next start asks for a login, and close."""
+        end_session()
+        self.close()
+
+    def close(self):
+        """Flush the journal and let a running compaction finish before closing."""
+        self.tasks.shutdown()
+        self.engine.close()
+        self.root.destroy()
+
+    # ---------------- Persistence ---------------- #
+
     def save_data(self):
-        """Save data to a CSV file."""
-        if self.data.empty:
-            self.update_status("No data to save", success=False)
+        """Save data to the storage backend, or the changed rows to the database."""
+        self.when_store_ready(self.start_save)
+
+    def start_save(self):
+        try:
+            prepared = self.engine.prepare_save()
+        except OSError as e:
+            self.update_status(f"Error saving data: {e}", success=False)
+            return
+        if prepared is None:
+            self.update_status("No changes to save", success=False)
             return
 
-        self.data.to_csv(self.data_file, index=False)
-        self.update_status("Data saved successfully!", success=True)
+        write, failed = prepared
+
+        def saved(written):
+            self.update_status(f"Data saved successfully! {written} entries written.", success=True)
 
-    def load_data(self):
-        """Load data from a CSV file."""
+        def save_failed(e):
+            # Keep the changes pending so the next save retries them
+            failed(e)
+            self.show_task_error("saving")(e)
+
+        self.update_status("Saving...", success=True)
+        self.tasks.submit("Saving", write, key='store', on_done=saved, on_error=save_failed)
+
+    def autosave(self):
+        """Periodically sync journaled changes to disk (see FitnessEngine.autosave)."""
         try:
-            self.data = pd.read_csv(self.data_file)
-            self.update_table()
-            self.update_status(f"Data loaded successfully! Total Entries: {self.data.shape[0]}", success=True)
-        except FileNotFoundError:
+            # A compaction during a load would write the store the load is about to replace
+            error = self.engine.autosave(compact=not self.tasks.busy('store'))
+        except OSError as e:
+            error = e
+        if error is not None:
+            self.update_status(f"Autosave failed: {error}", success=False)
+        self.root.after(AUTOSAVE_MS, self.autosave)
+
+    def load_data(self, cached=False):
+        """Load data from the storage backend, or the user's rows from the database, in the background.
+
+        With cached=True a database user's local copy is shown if there is one.
+        """
+        self.when_store_ready(self.start_load, cached)
+
+    def start_load(self, cached):
+        self.live_search.cancel()
+        self.engine.flush()
+        self.tasks.submit("Loading", self.engine.read, cached, key='store', on_done=self.show_loaded,
+                          on_error=self.show_load_error, on_progress=self.show_loading)
+
+    def show_loading(self, rows, fraction, view=None):
+        """Fill the table with the records read so far while a load is under way.
+
+        Their row ids are negated: they belong to the load's own store, not
+        to self.store, so they must not match any row of it, e.g. when a
+        row picked now is deleted once the load has finished.
+        """
+        self.show_progress("Loading")(rows, fraction)
+        if view is not None:
+            partial = view.frame()
+            self.table.set_data(partial.set_axis(-1 - partial.index))
+
+    def show_loaded(self, result):
+        """Swap the loaded records into the app's store (Tk thread)."""
+        self.show_data(self.engine.adopt(*result))
+
+    def show_data(self, message, success=True):
+        self.data = self.store.frame()
+        self.update_table()
+        self.update_status(f"{message} Total Entries: {self.data.shape[0]}", success=success)
+
+    def show_load_error(self, e):
+        self.update_table()  # Drop any partly loaded rows
+        if isinstance(e, FileNotFoundError):
             self.update_status("No saved data found", success=False)
+        else:
+            self.show_task_error("loading")(e)
 
     def update_table(self):
         """Update the Treeview table."""
-        self.tree.delete(*self.tree.get_children())  # Clear existing rows
-        for _, row in self.data.iterrows():
-            reordered_row = [row['Serial_No'], row['Day'], row['Weight (kg)'], row['Exercise_Split'], row['Diet (Calories)']]
-            self.tree.insert("", "end", values=reordered_row)
+        self.table.set_data(self.data)
+
+    def sort_rows(self, data, keys):
+        """Table sort order from the engine's cached column orders (click a heading; Shift-click adds a key)."""
+        order = self.engine.sort_order(keys, data.index)
+        return order if order is not None else sort_order(data, keys)
 
 
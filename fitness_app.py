@@ -1,10 +1,15 @@
 import tkinter as tk
+from datetime import date
 from tkinter import ttk, messagebox
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from bulk_dialog import BulkEditDialog, BulkEntryDialog
+from bulk_entry import SERIAL_LIMIT
+from chart import TrendChart
+from engine import FitnessEngine
+from virtual_table import VirtualTable, sort_order
 
-data_file = 'fitness.csv'
+AUTOSAVE_MS = 2000  # How often journaled changes are synced to disk
+BREAKDOWN_PERIODS = {'Day': 'weekday', 'Week': 'week', 'Month': 'month', 'Year': 'year'}  # Choice -> cube period
+BREAKDOWN_COLUMNS = ['Exercise_Split', 'Period', 'Entries', 'Weight (kg)', 'Diet (Calories)', 'Calories Total']
 
 # Initialize the main window
 root = tk.Tk()
@@ -12,8 +17,11 @@ root.title("Fitness Dashboard with Dynamic Charts")
 root.geometry("1200x900")  # Larger window size
 root.configure(bg="#f9f9f9")  # Light background for aesthetics
 
-# Initialize an empty DataFrame for fitness data
-data = pd.DataFrame(columns=['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'])
+# Headless engine holding the records and their persistence; `data` is its DataFrame view
+engine = FitnessEngine()
+store = engine.store
+aggregates = engine.aggregates  # Running dashboard metrics, updated on every store change
+data = store.frame()
 
 # ---------------- Styling ---------------- #
 
@@ -46,117 +54,181 @@ def add_data():
     """Add user input to the DataFrame."""
     global data
     serial_no = entry_serial.get()
+    entry_date = entry_date_field.get().strip()
     day = entry_day.get()
     weight = entry_weight.get()
     exercise_split = entry_exercise.get()
     diet = entry_diet.get()
 
-    if not serial_no or not day or not weight or not exercise_split or not diet:
+    # The day can be left out when the date is given
+    if not serial_no or not (day or entry_date) or not weight or not exercise_split or not diet:
         update_status("Please fill all fields", success=False)
         return
 
     try:
-        weight = float(weight)
-        diet = float(diet)
-        new_data = pd.DataFrame([[serial_no, day, weight, exercise_split, diet]],
-                                columns=['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'])
-        data = pd.concat([data, new_data], ignore_index=True)
-        update_table()
-        update_dashboard_metrics()
-        update_chart()  # Update the chart dynamically
-        update_status(f"Data added successfully! Total Entries: {data.shape[0]}", success=True)
+        engine.add(serial_no, day, weight, exercise_split, diet, entry_date)
     except ValueError:
-        update_status("Invalid data: Weight and Diet must be numbers.", success=False)
+        update_status(f"Invalid data: Serial No. must be a whole number within ±{SERIAL_LIMIT:,}, "
+                      "Weight and Diet numbers and Date YYYY-MM-DD.", success=False)
+        return
+    except KeyError:
+        update_status(f"Serial No. {serial_no} already exists.", success=False)
+        return
+
+    data = store.frame()
+    update_table()
+    update_dashboard_metrics()
+    update_chart()  # Update the chart dynamically
+    update_status(f"Data added successfully! Total Entries: {data.shape[0]}", success=True)
+
+def add_rows(rows, report):
+    """Add a batch validated in the Bulk Add window in one store update, refreshing the views once."""
+    global data
+    try:
+        added = engine.add_rows(rows)
+    except KeyError as e:
+        update_status(f"Bulk add failed: {e.args[0]}", success=False)
+        report(0, e.args[0])
+        return
+    report(added)
+
+    data = store.frame()
+    update_table()
+    update_dashboard_metrics()
+    update_chart()
+    update_status(f"Added {added} entries. Total Entries: {data.shape[0]}", success=True)
+
+def open_bulk_entry():
+    """Open the window for pasting or importing many entries at once."""
+    BulkEntryDialog(root, engine, add_rows)
 
 def delete_row():
-    """Delete selected row from the Treeview and DataFrame."""
+    """Delete the selected rows from the store in one update."""
     global data
-    selected_item = tree.selection()
-    if not selected_item:
+    selected = table.selection()
+    if not selected:
         update_status("No row selected to delete.", success=False)
         return
+    if len(selected) > 1 and not messagebox.askyesno("Delete Rows", f"Delete the {len(selected)} selected rows?"):
+        return
 
     try:
-        # Get the selected row values
-        row_values = tree.item(selected_item, 'values')
-        serial_no_to_delete = row_values[0]
-
-        # Remove from DataFrame
-        data = data[data['Serial_No'] != serial_no_to_delete].reset_index(drop=True)
+        # Treeview item ids are the records' stable row ids in the store
+        deleted = engine.delete_rows(selected)
+        data = store.frame()
 
-        # Remove from Treeview
-        tree.delete(selected_item)
+        # Refresh the visible window of the Treeview
+        update_table()
         update_dashboard_metrics()
         update_chart()  # Update the chart dynamically
-        update_status("Row deleted successfully.", success=True)
+        update_status("Row deleted successfully." if deleted == 1 else f"Deleted {deleted} rows.", success=True)
     except Exception as e:
-        update_status(f"Error deleting row: {e}", success=False)
+        update_status(f"Error deleting rows: {e}", success=False)
+
+def update_rows(selected, changes):
+    """Apply the values from the Edit Rows window to the selected rows in one update."""
+    global data
+    try:
+        row_ids = engine.edit_rows(selected, **changes)
+    except ValueError:
+        update_status("Invalid data: Weight and Diet must be numbers and Date YYYY-MM-DD.", success=False)
+        return
+    except KeyError as e:
+        update_status(f"Error editing rows: {e.args[0]}", success=False)
+        return
+
+    data = store.frame()
+    update_table()
+    update_dashboard_metrics()
+    update_chart()
+    update_status(f"Updated {len(row_ids)} rows.", success=True)
+
+def edit_rows():
+    """Give the selected rows new values (see BulkEditDialog)."""
+    selected = table.selection()
+    if not selected:
+        update_status("No rows selected to edit.", success=False)
+        return
+    BulkEditDialog(root, len(selected), lambda changes: update_rows(selected, changes))
 
 def load_data():
-    """Load data from a CSV file."""
+    """Load the saved log (see FitnessEngine.load)."""
     global data
     try:
-        data = pd.read_csv(data_file)
+        message = engine.load()
+        data = store.frame()
         update_table()
         update_dashboard_metrics()
         update_chart()  # Update the chart dynamically
-        update_status(f"Data loaded successfully! Total Entries: {data.shape[0]}", success=True)
+        update_status(f"{message} Total Entries: {data.shape[0]}", success=True)
     except FileNotFoundError:
         update_status("No saved data found.", success=False)
+    except (OSError, ValueError) as e:
+        update_status(f"Error loading data: {e}", success=False)
 
 def save_data():
-    """Save data to a CSV file."""
-    if data.empty:
-        update_status("No data to save", success=False)
+    """Save the changes; the data file is rewritten in the background."""
+    try:
+        written = engine.save()
+    except OSError as e:
+        update_status(f"Error saving data: {e}", success=False)
+        return
+    if written is None:
+        update_status("No changes to save", success=False)
         return
-
-    data.to_csv(data_file, index=False)
     update_status("Data saved successfully!", success=True)
 
+def autosave():
+    """Periodically sync journaled changes to disk."""
+    try:
+        error = engine.autosave()
+    except OSError as e:
+        error = e
+    if error is not None:
+        update_status(f"Autosave failed: {error}", success=False)
+    root.after(AUTOSAVE_MS, autosave)
+
+def close():
+    """Flush the journal and let a running compaction finish before closing."""
+    engine.close()
+    root.destroy()
+
 def update_table():
     """Update the Treeview table."""
-    tree.delete(*tree.get_children())  # Clear existing rows
-    for _, row in data.iterrows():
-        reordered_row = [row['Serial_No'], row['Day'], row['Weight (kg)'], row['Exercise_Split'], row['Diet (Calories)']]
-        tree.insert("", "end", values=reordered_row)
+    table.set_data(data)
+
+def sort_rows(rows, keys):
+    """Table sort order from the engine's cached column orders (click a heading; Shift-click adds a key)."""
+    order = engine.sort_order(keys, rows.index)
+    return order if order is not None else sort_order(rows, keys)
+
+def format_metric(value, unit, signed=False):
+    """Format a metric value for the dashboard, N/A when there is nothing to average."""
+    if value is None:
+        return "N/A"
+    return f"{value:+.2f} {unit}" if signed else f"{value:.2f} {unit}"
 
 def update_dashboard_metrics():
     """Update dashboard summary metrics."""
-    if data.empty:
-        total_entries_label.config(text="Total Entries: 0")
-        avg_weight_label.config(text="Average Weight: N/A")
-        avg_calories_label.config(text="Average Calories: N/A")
-        return
-
-    total_entries_label.config(text=f"Total Entries: {len(data)}")
-    avg_weight_label.config(text=f"Average Weight: {data['Weight (kg)'].mean():.2f} kg")
-    avg_calories_label.config(text=f"Average Calories: {data['Diet (Calories)'].mean():.2f} kcal")
+    total_entries_label.config(text=f"Total Entries: {len(store)}")
+    avg_weight_label.config(text=f"Average Weight: {format_metric(aggregates.weight.mean(), 'kg')}")
+    avg_calories_label.config(text=f"Average Calories: {format_metric(aggregates.calories.mean(), 'kcal')}")
+    weight_std_label.config(text=f"Weight Std Dev: {format_metric(aggregates.weight.std(), 'kg')}")
+    weight_trend_label.config(text=f"Weight Trend: {format_metric(aggregates.weight_trend.value(), 'kg/entry', signed=True)}")
+    window = "7-Day" if aggregates.metrics['weight_7'].by_date() else "Last 7 Entries"
+    recent_weight_label.config(text=f"{window} Avg Weight: {format_metric(aggregates.value('weight_7'), 'kg')}")
+    update_breakdown()
+
+def update_breakdown():
+    """Show the per-split breakdown for the chosen period, read from the aggregation cube."""
+    breakdown = aggregates.cube(BREAKDOWN_PERIODS[breakdown_period.get()]).frame()
+    breakdown = breakdown.rename_axis(['Exercise_Split', 'Period']).reset_index()
+    breakdown_table.set_data(breakdown[BREAKDOWN_COLUMNS].round({'Weight (kg)': 1, 'Diet (Calories)': 1}))
 
 # Dynamic Chart
 def update_chart():
-    """Update the dynamic chart with the latest data."""
-    for widget in chart_frame.winfo_children():
-        widget.destroy()  # Clear the previous chart
-
-    if data.empty:
-        no_data_label = ttk.Label(chart_frame, text="No data to display.", font=("Helvetica", 14, "bold"))
-        no_data_label.pack()
-        return
-
-    # Create Matplotlib Figure
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.plot(data.index, data['Weight (kg)'], marker='o', label='Weight (kg)', color='blue')
-    ax.plot(data.index, data['Diet (Calories)'], marker='x', label='Diet (Calories)', color='orange')
-    ax.set_title("Dynamic Fitness Trends", fontsize=16, fontweight="bold")
-    ax.set_xlabel("Entry Index", fontsize=12)
-    ax.set_ylabel("Values", fontsize=12)
-    ax.legend(fontsize=10)
-    ax.grid(color='gray', linestyle='--', linewidth=0.5, alpha=0.7)
-
-    # Embed Matplotlib Figure in Tkinter
-    canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-    canvas.draw()
-    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    """Update the dynamic chart with the latest data, against the dates once entries have them."""
+    chart.update(engine.trend(), store.version)
 
 # ---------------- Dashboard Layout ---------------- #
 
@@ -173,37 +245,60 @@ avg_weight_label.grid(row=0, column=1, padx=20, pady=5)
 avg_calories_label = ttk.Label(dashboard_frame, text="Average Calories: N/A", style="Summary.TLabel")
 avg_calories_label.grid(row=0, column=2, padx=20, pady=5)
 
+weight_std_label = ttk.Label(dashboard_frame, text="Weight Std Dev: N/A", style="Summary.TLabel")
+weight_std_label.grid(row=1, column=0, padx=20, pady=5)
+
+weight_trend_label = ttk.Label(dashboard_frame, text="Weight Trend: N/A", style="Summary.TLabel")
+weight_trend_label.grid(row=1, column=1, padx=20, pady=5)
+
+recent_weight_label = ttk.Label(dashboard_frame, text="7-Day Avg Weight: N/A", style="Summary.TLabel")
+recent_weight_label.grid(row=1, column=2, padx=20, pady=5)
+
+# Breakdown by Exercise Split per Day/week/month/year (see AggregateCube)
+breakdown_frame = ttk.Frame(dashboard_frame)
+breakdown_frame.grid(row=2, column=0, columnspan=3, sticky="ew", pady=5)
+
+ttk.Label(breakdown_frame, text="Breakdown by Exercise Split per").grid(row=0, column=0, padx=5, sticky="w")
+breakdown_period = ttk.Combobox(breakdown_frame, values=list(BREAKDOWN_PERIODS), state="readonly", width=8)
+breakdown_period.set('Month')
+breakdown_period.grid(row=0, column=1, padx=5, sticky="w")
+breakdown_period.bind("<<ComboboxSelected>>", lambda event: update_breakdown())
+
+breakdown_table = VirtualTable(breakdown_frame, BREAKDOWN_COLUMNS, height=5)
+for column in BREAKDOWN_COLUMNS:
+    breakdown_table.tree.column(column, width=120)
+breakdown_table.tree.grid(row=1, column=0, columnspan=2, padx=5, pady=5)
+breakdown_table.scrollbar.grid(row=1, column=2, sticky="ns")
+
 # Data Table
 tree_frame = ttk.Frame(root, padding=10)
 tree_frame.grid(row=1, column=0, sticky="nsew", pady=10)
 
-tree = ttk.Treeview(tree_frame, columns=['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'], show='headings', height=10)
+# Virtualized table: only the rows in view are materialized
+table = VirtualTable(tree_frame, ['Serial_No', 'Date', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)'], height=10, sorter=sort_rows)
+tree = table.tree
 tree.grid(row=0, column=0, columnspan=5, padx=5, pady=5)
 
-# Add column headers to the Treeview
-for col in ['Serial_No', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)']:
-    tree.heading(col, text=col)
-    tree.column(col, width=150)
-
-scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-tree.configure(yscroll=scrollbar.set)
-scrollbar.grid(row=0, column=6, sticky="ns")
+table.scrollbar.grid(row=0, column=6, sticky="ns")
 
 # Buttons
 button_frame = ttk.Frame(root, padding=10)
 button_frame.grid(row=2, column=0, pady=10)
 
 ttk.Button(button_frame, text="Add Data", command=add_data).grid(row=0, column=0, padx=5)
-ttk.Button(button_frame, text="Delete Row", command=delete_row).grid(row=0, column=1, padx=5)
-ttk.Button(button_frame, text="Plot Data", command=update_chart).grid(row=0, column=2, padx=5)
-ttk.Button(button_frame, text="Save Data", command=save_data).grid(row=0, column=3, padx=5)
-ttk.Button(button_frame, text="Load Data", command=load_data).grid(row=0, column=4, padx=5)
+ttk.Button(button_frame, text="Bulk Add", command=open_bulk_entry).grid(row=0, column=1, padx=5)
+ttk.Button(button_frame, text="Delete Rows", command=delete_row).grid(row=0, column=2, padx=5)
+ttk.Button(button_frame, text="Edit Rows", command=edit_rows).grid(row=0, column=3, padx=5)
+ttk.Button(button_frame, text="Plot Data", command=update_chart).grid(row=0, column=4, padx=5)
+ttk.Button(button_frame, text="Save Data", command=save_data).grid(row=0, column=5, padx=5)
+ttk.Button(button_frame, text="Load Data", command=load_data).grid(row=0, column=6, padx=5)
 
 # Dynamic Chart Frame
 chart_frame = ttk.Frame(root, padding=10)
 chart_frame.grid(row=3, column=0, sticky="nsew", pady=10)
 chart_frame.columnconfigure(0, weight=1)
 chart_frame.rowconfigure(0, weight=1)
+chart = TrendChart(chart_frame)
 
 # Input Form
 input_frame = ttk.Frame(root, padding=10)
@@ -214,21 +309,26 @@ ttk.Label(input_frame, text="Serial No.").grid(row=0, column=0, padx=5, pady=5,
 entry_serial = ttk.Entry(input_frame, width=20)
 entry_serial.grid(row=0, column=1, padx=5, pady=5)
 
-ttk.Label(input_frame, text="Day").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+ttk.Label(input_frame, text="Date (YYYY-MM-DD)").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+entry_date_field = ttk.Entry(input_frame, width=20)
+entry_date_field.insert(0, date.today().isoformat())
+entry_date_field.grid(row=1, column=1, padx=5, pady=5)
+
+ttk.Label(input_frame, text="Day").grid(row=2, column=0, padx=5, pady=5, sticky="w")
 entry_day = ttk.Entry(input_frame, width=20)
-entry_day.grid(row=1, column=1, padx=5, pady=5)
+entry_day.grid(row=2, column=1, padx=5, pady=5)
 
-ttk.Label(input_frame, text="Weight (kg)").grid(row=2, column=0, padx=5, pady=5, sticky="w")
+ttk.Label(input_frame, text="Weight (kg)").grid(row=3, column=0, padx=5, pady=5, sticky="w")
 entry_weight = ttk.Entry(input_frame, width=20)
-entry_weight.grid(row=2, column=1, padx=5, pady=5)
+entry_weight.grid(row=3, column=1, padx=5, pady=5)
 
-ttk.Label(input_frame, text="Exercise Split").grid(row=3, column=0, padx=5, pady=5, sticky="w")
+ttk.Label(input_frame, text="Exercise Split").grid(row=4, column=0, padx=5, pady=5, sticky="w")
 entry_exercise = ttk.Entry(input_frame, width=20)
-entry_exercise.grid(row=3, column=1, padx=5, pady=5)
+entry_exercise.grid(row=4, column=1, padx=5, pady=5)
 
-ttk.Label(input_frame, text="Diet (Calories)").grid(row=4, column=0, padx=5, pady=5, sticky="w")
+ttk.Label(input_frame, text="Diet (Calories)").grid(row=5, column=0, padx=5, pady=5, sticky="w")
 entry_diet = ttk.Entry(input_frame, width=20)
-entry_diet.grid(row=4, column=1, padx=5, pady=5)
+entry_diet.grid(row=5, column=1, padx=5, pady=5)
 
 # Message Label
 message_label = ttk.Label(root, text="", font=("Helvetica", 12))
@@ -243,6 +343,8 @@ root.grid_columnconfigure(0, weight=1)  # Expand horizontally
 load_data()
 update_dashboard_metrics()
 update_chart()
+root.after(AUTOSAVE_MS, autosave)
+root.protocol("WM_DELETE_WINDOW", close)
 
 # Run the GUI Loop
 root.mainloop()
@@ -0,0 +1,166 @@
+import math
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from db_setup import db_cursor, get_pool
+
+PAGE_SIZE = 5000
+BATCH_SIZE = 1000
+
+# Store column -> workouts table column
+DB_COLUMNS = {
+    'Serial_No': 'serial_no',
+    'Date': 'date',
+    'Day': 'day',
+    'Weight (kg)': 'weight',
+    'Exercise_Split': 'split',
+    'Diet (Calories)': 'calories',
+}
+
+
+def _sql_value(value):
+    """Convert numpy scalars and NaN to what the DB drivers expect."""
+    if value is None:
+        return None
+    if isinstance(value, np.datetime64):
+        # DATE columns take "YYYY-MM-DD" on every backend
+        return None if np.isnat(value) else str(value.astype('datetime64[D]'))
+    if isinstance(value, np.float32):
+        # Go through the shortest repr so 70.7 is stored as 70.7, not 70.69999694824219
+        value = float(str(value))
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class WorkoutRepository:
+    """One user's rows in the `workouts` table."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    def _frame(self, rows):
+        return pd.DataFrame(rows, columns=list(DB_COLUMNS)).astype({'Weight (kg)': float, 'Diet (Calories)': float})
+
+    def count(self):
+        with db_cursor() as cursor:
+            return cursor.execute("SELECT COUNT(*) FROM workouts WHERE user_id = %s", (self.user_id,)).fetchone()[0]
+
+    def iter_pages(self, page_size=PAGE_SIZE):
+        """Yield the user's workouts as DataFrames of up to `page_size` rows, in Serial_No order.
+
+        Pages are fetched with keyset pagination (serial_no > last seen), so
+        every page costs the same regardless of how deep into the log it is.
+        """
+        columns = ", ".join(DB_COLUMNS.values())
+        last_serial = None
+        while True:
+            with db_cursor() as cursor:
+                if last_serial is None:
+                    cursor.execute(f"SELECT {columns} FROM workouts WHERE user_id = %s "
+                                   "ORDER BY serial_no LIMIT %s", (self.user_id, page_size))
+                else:
+                    cursor.execute(f"SELECT {columns} FROM workouts WHERE user_id = %s AND serial_no > %s "
+                                   "ORDER BY serial_no LIMIT %s", (self.user_id, last_serial, page_size))
+                rows = cursor.fetchall()
+            if not rows:
+                return
+            yield self._frame(rows)
+            if len(rows) < page_size:
+                return
+            last_serial = rows[-1][0]
+
+    def save(self, upserts, deleted_serials, replace_all=False):
+        """Write a batch of changes in one transaction.
+
+        `upserts` is a list of records (dicts keyed by store column) to insert
+        or update, `deleted_serials` the Serial_Nos to remove. With
+        replace_all=True the user's existing rows are removed first.
+        """
+        columns = ['user_id'] + list(DB_COLUMNS.values())
+        updated = [column for column in columns if column not in ('user_id', 'serial_no')]
+        insert = (f"INSERT INTO workouts ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                  + get_pool().backend.upsert("user_id, serial_no", updated))
+        rows = [[self.user_id] + [_sql_value(record[column]) for column in DB_COLUMNS] for record in upserts]
+
+        with db_cursor(commit=True) as cursor:
+            if replace_all:
+                cursor.execute("DELETE FROM workouts WHERE user_id = %s", (self.user_id,))
+            for start in range(0, len(deleted_serials), BATCH_SIZE):
+                batch = deleted_serials[start:start + BATCH_SIZE]
+                cursor.executemany("DELETE FROM workouts WHERE user_id = %s AND serial_no = %s",
+                                   [(self.user_id, _sql_value(serial_no)) for serial_no in batch])
+            for start in range(0, len(rows), BATCH_SIZE):
+                cursor.executemany(insert, rows[start:start + BATCH_SIZE])
+
+
+class DirtyTracker:
+    """Remembers which store records changed since the last save.
+
+    It listens to the record store, so saving only has to write the records
+    that were added or deleted since then.
+    """
+
+    def __init__(self, store):
+        self._suspended = False
+        self.reset()
+        store.subscribe(self._on_change)
+
+    def reset(self):
+        self.upserts = {}  # Serial_No -> record
+        self.deleted = set()
+        self.replace_all = False
+
+    def __bool__(self):
+        return bool(self.upserts or self.deleted or self.replace_all)
+
+    def __len__(self):
+        return len(self.upserts) + len(self.deleted)
+
+    @contextmanager
+    def suspend(self):
+        """Ignore store changes inside the block, e.g. while loading saved rows."""
+        self._suspended = True
+        try:
+            yield
+        finally:
+            self._suspended = False
+
+    def take(self):
+        """Return (upserts, deleted_serials, replace_all) and start tracking afresh."""
+        changes = (list(self.upserts.values()), sorted(self.deleted), self.replace_all)
+        self.reset()
+        return changes
+
+    def restore(self, upserts, deleted_serials, replace_all):
+        """Put back changes from take() that failed to save; newer changes win."""
+        for record in upserts:
+            serial_no = int(record['Serial_No'])
+            if serial_no not in self.upserts and serial_no not in self.deleted:
+                self.upserts[serial_no] = record
+        for serial_no in deleted_serials:
+            if serial_no not in self.upserts:
+                self.deleted.add(serial_no)
+        self.replace_all = self.replace_all or replace_all
+
+    def _on_change(self, event, records):
+        if self._suspended:
+            return
+        if event == 'clear':
+            self.reset()
+            self.replace_all = True
+            return
+
+        count = len(records['row_id'])
+        for position in range(count):
+            serial_no = int(records['Serial_No'][position])
+            if event == 'append':
+                self.upserts[serial_no] = {column: records[column][position] for column in DB_COLUMNS}
+                self.deleted.discard(serial_no)
+            else:
+                self.upserts.pop(serial_no, None)
+                self.deleted.add(serial_no)
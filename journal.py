@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from record_store import COLUMNS
+from storage import snapshot
+
+SYNC_EVERY = 32         # Changes written between fsyncs; 1 syncs every change
+COMPACT_EVENTS = 5000   # Journal length that triggers a background compaction
+
+
+class Journal:
+    """Append-only log of the store's changes since the data file was last written.
+
+    Every append/delete/clear/update on the store becomes one JSON line in
+    `<storage path>.journal`, so saving costs only the size of the change.
+    Lines are fsynced in batches of `sync_every`, and sync() flushes the rest.
+    compact() writes a snapshot of the store to the storage backend on a
+    background thread and then drops the journal lines it covers. After a
+    crash, replay() applies whatever the data file is missing.
+
+    Replaying is idempotent (appends replace records with the same Serial_No,
+    deletes and updates of missing records are skipped), so a journal that outlived a
+    finished compaction is harmless.
+    """
+
+    def __init__(self, store, storage, sync_every=SYNC_EVERY):
+        self.store = store
+        self.storage = storage
+        self.path = f"{storage.path}.journal"
+        self.old_path = f"{self.path}.old"  # Lines being compacted into the data file
+        self.sync_every = sync_every
+        self.events = 0    # Lines in the active journal
+        self.unsynced = 0
+        self.error = None  # Exception from the last failed compaction
+        self._suspended = False
+        self._thread = None
+        self._handle = None
+        store.subscribe(self._on_change)
+
+    # ---------------- Writing ---------------- #
+
+    def _on_change(self, event, records):
+        if self._suspended:
+            return
+        if event == 'clear':
+            entry = {'op': 'clear'}
+        elif event == 'append':
+            rows = {column: records[column].tolist() for column in COLUMNS if column != 'Date'}
+            rows['Date'] = np.datetime_as_string(records['Date'], unit='D').tolist()  # NaT is written as "NaT"
+            entry = {'op': 'update' if records.get('in_place') else 'append', 'rows': rows}
+        elif records.get('in_place'):
+            return  # The 'update' entry of the append that follows covers it
+        else:
+            entry = {'op': 'delete', 'serials': records['Serial_No'].tolist()}
+        self._write(json.dumps(entry) + "\n")
+
+    def _write(self, line):
+        if self._handle is None:
+            self._handle = open(self.path, 'a', encoding='utf-8')
+        self._handle.write(line)
+        self.events += 1
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """Flush buffered lines and fsync them to disk."""
+        if self._handle is None or not self.unsynced:
+            return
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        self.sync()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    @contextmanager
+    def suspend(self):
+        """Ignore store changes inside the block, e.g. while loading the data file."""
+        self._suspended = True
+        try:
+            yield
+        finally:
+            self._suspended = False
+
+    # ---------------- Compaction ---------------- #
+
+    @property
+    def compacting(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def pending(self):
+        """Whether there are journaled changes the data file does not have yet."""
+        return any(os.path.exists(path) and os.path.getsize(path) for path in (self.old_path, self.path))
+
+    def compact(self):
+        """Write the store to the storage backend in the background and retire the journal.
+
+        The store is snapshotted here, on the calling thread; new changes keep
+        going to a fresh journal while the snapshot is written. Returns False
+        if a compaction is already running.
+        """
+        if self.compacting:
+            return False
+        self.close()
+        if os.path.exists(self.path):
+            if os.path.exists(self.old_path):
+                # A previous compaction failed; keep its lines until one succeeds
+                with open(self.old_path, 'ab') as old, open(self.path, 'rb') as active:
+                    old.write(active.read())
+                os.remove(self.path)
+            else:
+                os.rename(self.path, self.old_path)
+        self.events = 0
+
+        self.error = None
+        self._thread = threading.Thread(target=self._write_snapshot, args=(snapshot(self.store),), daemon=True)
+        self._thread.start()
+        return True
+
+    def _write_snapshot(self, copy):
+        try:
+            self.storage.save(copy)
+            if os.path.exists(self.old_path):
+                os.remove(self.old_path)
+        except Exception as e:
+            self.error = e
+
+    def wait(self, timeout=None):
+        """Block until a running compaction finishes."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ---------------- Recovery ---------------- #
+
+    def replay(self, store=None):
+        """Apply journaled changes to a store loaded from the data file; returns how many.
+
+        `store` defaults to the journaled store, whose journal then counts
+        the replayed lines as its events. A fresh store being loaded on a
+        worker thread can be passed instead; the journal's own state is left
+        alone, and the caller sets `events` on the owning thread once the
+        store is adopted. A torn last line from a crash mid-write is cut
+        off, so the journal can be appended to again.
+        """
+        if store is None:
+            with self.suspend():
+                self.events = self.replay(self.store)
+            return self.events
+        applied = 0
+        for path in (self.old_path, self.path):
+            if os.path.exists(path):
+                applied += self._replay_file(path, store)
+        return applied
+
+    def _replay_file(self, path, store):
+        applied = 0
+        good = 0
+        appends = []  # Consecutive appends are applied as one batch
+        with open(path, 'rb') as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                applied += 1
+                if entry['op'] == 'append':
+                    appends.append(pd.DataFrame(entry['rows'], columns=COLUMNS))
+                    continue
+                self._apply_appends(appends, store)
+                appends = []
+                if entry['op'] == 'clear':
+                    store.clear()
+                elif entry['op'] == 'update':
+                    rows = pd.DataFrame(entry['rows'], columns=COLUMNS)
+                    store.update_serials(rows[store.contains(rows['Serial_No'])])
+                else:
+                    for serial_no in entry['serials']:
+                        if serial_no in store:
+                            store.delete_serial(serial_no)
+        self._apply_appends(appends, store)
+        if good < os.path.getsize(path):
+            with open(path, 'r+b') as handle:
+                handle.truncate(good)
+        return applied
+
+    def _apply_appends(self, frames, store):
+        if frames:
+            store.extend(pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0])
@@ -0,0 +1,120 @@
+import queue
+import threading
+
+
+class LiveSearch:
+    """Debounced search-as-you-type that filters on a worker thread.
+
+    Keystrokes in `entry` (re)start a short debounce timer; when it fires,
+    a read-only view of `store` is taken on the Tk thread (see
+    FitnessRecordStore.view) and handed with the query to a single
+    background worker, which calls `search(query, view)`. The worker always
+    picks up the newest query and skips the ones it was superseded by, and
+    never touches the live store. Results travel back through a queue that
+    the Tk thread polls with after(); only the result of the latest query is
+    delivered to `on_result(query, rows)` (or `on_error(query, error)`), and
+    a result computed on a view the store has since moved past is dropped
+    and the query run again, so the entry itself never waits on a search.
+    """
+
+    def __init__(self, entry, store, search, on_result, on_error, delay=200, poll=15):
+        self.entry = entry
+        self.store = store
+        self.search = search
+        self.on_result = on_result
+        self.on_error = on_error
+        self.delay = delay  # Debounce delay in ms
+        self.poll = poll    # Result polling interval in ms
+        self.generation = 0  # Id of the newest query; older results are stale
+        self._delivered = 0
+        self._last_query = None
+        self._pending = None  # after() id of the debounce timer
+        self._polling = None  # after() id of the result poll
+
+        self._lock = threading.Lock()
+        self._request = None  # (generation, query, view) waiting for the worker
+        self._wakeup = threading.Event()
+        self._results = queue.Queue()
+        threading.Thread(target=self._work, daemon=True).start()
+
+        entry.bind("<KeyRelease>", lambda event: self.schedule())
+
+    # ---------------- Tk thread ---------------- #
+
+    def schedule(self):
+        """Restart the debounce timer."""
+        if self._pending is not None:
+            self.entry.after_cancel(self._pending)
+        self._pending = self.entry.after(self.delay, self.run_now)
+
+    def run_now(self):
+        """Send the current entry text to the worker without waiting for the debounce."""
+        if self._pending is not None:
+            self.entry.after_cancel(self._pending)
+            self._pending = None
+
+        query = self.entry.get()
+        if query == self._last_query:
+            return  # e.g. a key release that did not change the text
+        self._last_query = query
+        self.generation += 1
+        with self._lock:
+            self._request = (self.generation, query, self.store.view())
+        self._wakeup.set()
+        if self._polling is None:
+            self._polling = self.entry.after(self.poll, self._deliver)
+
+    def cancel(self):
+        """Drop the pending and in-flight queries, e.g. before the data changes."""
+        if self._pending is not None:
+            self.entry.after_cancel(self._pending)
+            self._pending = None
+        self.generation += 1
+        self._delivered = self.generation
+        self._last_query = None
+
+    def _deliver(self):
+        self._polling = None
+        latest = None
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if result[0] == self.generation:
+                latest = result
+
+        if latest is not None:
+            generation, query, stamp, rows, error = latest
+            if stamp != self.store.stamp:
+                # The store changed while the worker searched an older view
+                self._last_query = None
+                self.run_now()
+                return
+            self._delivered = generation
+            if error is not None:
+                self.on_error(query, error)
+            else:
+                self.on_result(query, rows)
+        elif self._delivered != self.generation:
+            self._polling = self.entry.after(self.poll, self._deliver)
+
+    # ---------------- Worker thread ---------------- #
+
+    def _work(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                request, self._request = self._request, None
+            if request is None:
+                continue
+
+            generation, query, view = request
+            if generation != self.generation:
+                continue  # Superseded before it started
+            try:
+                rows, error = self.search(query, view), None
+            except Exception as e:
+                rows, error = None, e
+            self._results.put((generation, query, view.stamp, rows, error))
@@ -0,0 +1,113 @@
+import numpy as np
+from matplotlib.dates import AutoDateLocator, ConciseDateFormatter, date2num
+from matplotlib.ticker import AutoLocator, ScalarFormatter
+
+
+class LodPyramid:
+    """Min/max level-of-detail pyramid for one series.
+
+    Level k splits the series into buckets of 2**k consecutive points and keeps
+    the positions of each bucket's smallest and largest value, so drawing a
+    level never hides a peak or a dip. Level k is built from level k-1, which
+    makes the whole pyramid O(n) to build and about 2n positions in size.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self.size = len(values)
+        # Missing values never win a bucket unless the whole bucket is missing
+        low = np.where(np.isnan(values), np.inf, values)
+        high = np.where(np.isnan(values), -np.inf, values)
+
+        positions = np.arange(self.size)
+        self.levels = [(positions, positions)]
+        mins = maxs = positions
+        while len(mins) > 1:
+            if len(mins) % 2:
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+            left, right = mins[0::2], mins[1::2]
+            mins = np.where(low[right] < low[left], right, left)
+            left, right = maxs[0::2], maxs[1::2]
+            maxs = np.where(high[right] > high[left], right, left)
+            self.levels.append((mins, maxs))
+
+    def select(self, start, stop, max_points):
+        """Sorted positions representing points [start, stop) with about max_points points."""
+        count = stop - start
+        if count <= max_points:
+            return np.arange(start, max(start, stop))
+
+        # Each bucket contributes two points, its minimum and its maximum
+        level = 1
+        while level + 1 < len(self.levels) and 2 * (count >> level) > max_points:
+            level += 1
+        mins, maxs = self.levels[level]
+        first, last = start >> level, ((stop - 1) >> level) + 1
+        picked = np.concatenate(([start], mins[first:last], maxs[first:last], [stop - 1]))
+        return np.unique(picked[(picked >= start) & (picked < stop)])
+
+
+class LodCache:
+    """LodPyramids per column, kept until the dataset version changes."""
+
+    def __init__(self):
+        self.version = None
+        self.pyramids = {}
+
+    def pyramid(self, version, column, values):
+        if version != self.version:
+            self.version = version
+            self.pyramids = {}
+        if column not in self.pyramids:
+            self.pyramids[column] = LodPyramid(values)
+        return self.pyramids[column]
+
+
+class LodLine:
+    """Keeps a Line2D showing roughly one point per pixel of its axes' visible x-range."""
+
+    def __init__(self, line, x, y, pyramid=None, marker=None):
+        self.line = line
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.pyramid = pyramid if pyramid is not None else LodPyramid(self.y)
+        self.marker = marker if marker is not None else line.get_marker()
+        # Zooming only narrows the point range when x is sorted
+        self.sorted = bool(np.all(np.diff(self.x) >= 0))
+
+    def refresh(self, full=False):
+        """Recompute the drawn points for the current view (or the whole series)."""
+        axes = self.line.axes
+        start, stop = 0, len(self.x)
+        if not full and self.sorted:
+            low, high = sorted(axes.get_xlim())
+            start = max(0, int(np.searchsorted(self.x, low)) - 1)
+            stop = min(len(self.x), int(np.searchsorted(self.x, high, side='right')) + 1)
+
+        positions = self.pyramid.select(start, stop, max(1, int(axes.bbox.width)))
+        self.line.set_data(self.x[positions], self.y[positions])
+        # Markers only make sense while every point is drawn
+        self.line.set_marker(self.marker if len(positions) == stop - start else 'None')
+
+
+def follow_view(axes, lod_lines):
+    """Refresh `lod_lines` (a list that may be replaced in place) whenever the x-range changes."""
+    return axes.callbacks.connect('xlim_changed', lambda axes: [lod_line.refresh() for lod_line in lod_lines])
+
+
+def plot_x(index):
+    """x values to plot a frame's index against: matplotlib date numbers for dates, else the index as is."""
+    values = np.asarray(index)
+    return date2num(values) if values.dtype.kind == 'M' else values
+
+
+def date_axis(axes, dated):
+    """Label the x ticks as dates, or (dated=False) as plain numbers again."""
+    if dated:
+        locator = AutoDateLocator()
+        axes.xaxis.set_major_locator(locator)
+        axes.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+    else:
+        axes.xaxis.set_major_locator(AutoLocator())
+        axes.xaxis.set_major_formatter(ScalarFormatter())
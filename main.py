@@ -1,14 +1,52 @@
+import time
+
+STARTED = time.perf_counter()
+
+import statistics
+import subprocess
+import sys
 from tkinter import Tk
 from nav import NavigationManager
-from db_setup import create_database
+from db_setup import start_bootstrap
+
+
+def report_first_window(root):
+    """Draw the window, print the time since the process started and quit (--first-window)."""
+    root.update()
+    elapsed = (time.perf_counter() - STARTED) * 1000
+    heavy = [name for name in ('pandas', 'matplotlib', 'numpy') if name in sys.modules]
+    print(f"{elapsed:.1f} ms to first window; heavy modules loaded: {', '.join(heavy) or 'none'}")
+    root.destroy()
+
+
+def benchmark_startup(runs=5):
+    """Start the app `runs` times in fresh interpreters and report the median time to first window."""
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, __file__, "--first-window"],
+                                capture_output=True, text=True, check=True).stdout
+        print(output.strip())
+        times.append(float(output.split(" ms")[0]))
+    print(f"Median time to first window: {statistics.median(times):.1f} ms")
+
 
 if __name__ == "__main__":
-    create_database()
+    if "--startup-benchmark" in sys.argv:
+        benchmark_startup()
+        sys.exit()
+
     root = Tk()
     root.title("Fitness Tracker")
     # app = fitness_app.FitnessApp(root)  # Wrap the fitness tracker in a class
     navigation_manager = NavigationManager(root)
-    navigation_manager.show_login()
-    # navigation_manager.show_splash()
+    # navigation_manager.show_login()
+    navigation_manager.show_splash()  # Preloads in the background, then shows the login
+
+    if "--first-window" in sys.argv:
+        report_first_window(root)
+        sys.exit()
+
+    # The database is created in the background; the splash and logins wait for it on their workers
+    start_bootstrap()
 
     root.mainloop()
@@ -1,18 +1,29 @@
 from auth import AuthApp
-from fit import FitnessApp
+from sessions import resume_session
 from splash import SplashApp
 
 
 class NavigationManager:
     def __init__(self, root):
         self.root = root
-        
+
     def show_login(self):
         AuthApp(self.root, self)
 
     def show_splash(self):
         SplashApp(self.root, self)
-    
-    def show_fitness_app(self):
-        FitnessApp(self.root)
-        
+
+    def resume_or_login(self):
+        """Open the app straight away for a remembered login, otherwise show the login window."""
+        session = resume_session()
+        if session is None:
+            self.show_login()
+            return
+        self.root.destroy()
+        self.show_fitness_app(session['user_id'])
+
+    def show_fitness_app(self, user_id=None):
+        # Imported on first use: fit pulls in pandas and matplotlib (the splash preloads it)
+        from fit import FitnessApp
+
+        FitnessApp(self.root, user_id=user_id)
@@ -0,0 +1,494 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Serial_No', 'Date', 'Day', 'Weight (kg)', 'Exercise_Split', 'Diet (Calories)']
+CATEGORICAL = ('Day', 'Exercise_Split')
+_COLUMN_ARRAYS = {
+    'Serial_No': '_serial',
+    'Date': '_date',
+    'Day': '_day',
+    'Weight (kg)': '_weight',
+    'Exercise_Split': '_split',
+    'Diet (Calories)': '_diet',
+}
+NO_DATE = np.datetime64('NaT', 's')
+
+
+def date_array(values):
+    """Dates as a datetime64[s] array at midnight; missing ones (None, '', NaN) become NaT.
+
+    Accepts ISO 8601 strings ("2024-03-01"), date/datetime objects and
+    datetime64 values. Raises ValueError for anything else.
+    """
+    dates = np.asarray(pd.to_datetime(values, format='ISO8601'), dtype='datetime64[s]')
+    return dates.astype('datetime64[D]').astype('datetime64[s]')
+
+
+def to_date(value):
+    """A single date as datetime64[s] at midnight, without the overhead of date_array().
+
+    Takes ISO strings, date/datetime objects, datetime64 and None (NaT).
+    """
+    return np.datetime64(value).astype('datetime64[D]').astype('datetime64[s]')
+
+
+class FitnessRecordStore:
+    """Append-optimized columnar store for fitness records.
+
+    Every column lives in its own typed numpy array that grows geometrically,
+    so appends are amortized O(1). Weight and calories are float32, dates are
+    datetime64[s] (NaT when unknown), Day and Exercise_Split are stored as
+    category codes. Deletes only clear an ``alive`` flag (O(1) through the
+    Serial_No index); dead slots are compacted away once they outnumber the
+    live ones. Each record also carries a stable, increasing row id that the
+    table uses as its Treeview item id.
+
+    Listeners registered with subscribe() hear about every append, delete and
+    clear, so derived structures can be maintained incrementally.
+    """
+
+    _ARRAYS = ('_serial', '_date', '_day', '_weight', '_split', '_diet', '_row_id', '_alive')
+
+    def __init__(self, capacity=1024):
+        self.version = 0     # Bumped on every mutation, used to cache derived data
+        self.generation = 0  # Bumped whenever slots are renumbered or rewritten (clear/compact/update)
+        self._size = 0    # Slots in use, including deleted ones
+        self._dead = 0
+        self._next_row_id = 0
+        self._index = {}  # Serial_No -> slot, None until rebuilt (see _serial_index)
+        self._categories = {'Day': [], 'Exercise_Split': []}
+        self._category_codes = {'Day': {}, 'Exercise_Split': {}}
+        self._frame = None
+        self._frame_version = -1
+        self._listeners = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self._adopted = False  # Whether the column arrays came from adopt() and are not the store's own
+        self._serial = np.empty(capacity, dtype=np.int64)
+        self._date = np.empty(capacity, dtype='datetime64[s]')
+        self._day = np.empty(capacity, dtype=np.int32)
+        self._weight = np.empty(capacity, dtype=np.float32)
+        self._split = np.empty(capacity, dtype=np.int32)
+        self._diet = np.empty(capacity, dtype=np.float32)
+        self._row_id = np.empty(capacity, dtype=np.int64)
+        self._alive = np.empty(capacity, dtype=bool)
+
+    def _reserve(self, extra):
+        """Make room for `extra` more slots, doubling the capacity as needed."""
+        needed = self._size + extra
+        if needed <= len(self._serial) and not self._adopted:
+            return
+        # Arrays from adopt() may be read-only maps (or empty) and are copied before the first write
+        capacity = max(1, len(self._serial))
+        while capacity < needed:
+            capacity *= 2
+        for name in self._ARRAYS:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+        self._adopted = False
+
+    @property
+    def _serial_index(self):
+        """Serial_No -> slot of the live records, rebuilt on first use after a compaction or adopt()."""
+        if self._index is None:
+            live = np.flatnonzero(self._alive[:self._size])
+            self._index = dict(zip(self._serial[live].tolist(), live.tolist()))
+        return self._index
+
+    def _code(self, column, value):
+        """Category code for a Day/Exercise_Split value, registering new ones."""
+        codes = self._category_codes[column]
+        if value not in codes:
+            codes[value] = len(self._categories[column])
+            self._categories[column].append(value)
+        return codes[value]
+
+    # ---------------- Mutations ---------------- #
+
+    def __len__(self):
+        return self._size - self._dead
+
+    def __contains__(self, serial_no):
+        return int(serial_no) in self._serial_index
+
+    def contains(self, serial_nos):
+        """Boolean array telling which of the given Serial_Nos are live records, by hash lookup."""
+        index = self._serial_index
+        serial_nos = np.asarray(serial_nos, dtype=np.int64)
+        return np.fromiter((serial_no in index for serial_no in serial_nos.tolist()), dtype=bool, count=len(serial_nos))
+
+    def append(self, serial_no, day, weight, exercise_split, diet, date=None):
+        """Append one record and return its row id."""
+        serial_no = int(serial_no)
+        if serial_no in self._serial_index:
+            raise KeyError(f"Serial No. {serial_no} already exists.")
+        date = to_date(date)
+
+        self._reserve(1)
+        slot = self._size
+        self._serial[slot] = serial_no
+        self._date[slot] = date
+        self._day[slot] = self._code('Day', str(day))
+        self._weight[slot] = float(weight)
+        self._split[slot] = self._code('Exercise_Split', str(exercise_split))
+        self._diet[slot] = float(diet)
+        self._row_id[slot] = self._next_row_id
+        self._alive[slot] = True
+
+        self._serial_index[serial_no] = slot
+        self._size += 1
+        self._next_row_id += 1
+        self.version += 1
+        if self._listeners:
+            self._notify('append', self._records(slice(slot, slot + 1)))
+        return self._next_row_id - 1
+
+    def extend(self, frame):
+        """Append every row of a DataFrame with the store's columns in one vectorized pass.
+
+        A frame without a Date column adds undated records. Returns the
+        row ids of the new records.
+        """
+        count = len(frame)
+        if not count:
+            return self._row_id[:0].copy()
+        serials = frame['Serial_No'].to_numpy(dtype=np.int64)
+        self._reserve(count)
+        start, stop = self._size, self._size + count
+
+        self._serial[start:stop] = serials
+        self._date[start:stop] = date_array(frame['Date']) if 'Date' in frame else NO_DATE
+        for column, target in (('Day', self._day), ('Exercise_Split', self._split)):
+            values = frame[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, labels = pd.factorize(values)
+            # Translate the batch's codes to the store's; missing (-1) picks the trailing -1
+            lookup = np.array([self._code(column, str(label)) for label in labels] + [-1], dtype=np.int32)
+            target[start:stop] = lookup[codes]
+        self._weight[start:stop] = frame['Weight (kg)'].to_numpy(dtype=np.float32)
+        self._diet[start:stop] = frame['Diet (Calories)'].to_numpy(dtype=np.float32)
+        self._row_id[start:stop] = np.arange(self._next_row_id, self._next_row_id + count)
+        self._alive[start:stop] = True
+
+        # Later rows win on duplicate serials, the earlier copies are dropped
+        batch_index = dict(zip(serials.tolist(), range(start, stop)))
+        replaced = [self._serial_index[serial_no] for serial_no in batch_index.keys() & self._serial_index.keys()]
+        if len(batch_index) < count:
+            superseded = np.ones(count, dtype=bool)
+            superseded[np.fromiter(batch_index.values(), dtype=np.int64, count=len(batch_index)) - start] = False
+            replaced.extend((start + np.flatnonzero(superseded)).tolist())
+        self._serial_index.update(batch_index)
+
+        self._size = stop
+        self._next_row_id += count
+        self.version += 1
+        # Listeners see the replaced copies go before the batch arrives, so the
+        # two events net out to the batch's surviving records
+        if replaced:
+            replaced = np.array(replaced)
+            self._alive[replaced] = False
+            self._dead += len(replaced)
+            if self._listeners:
+                self._notify('delete', self._records(replaced))
+        if self._listeners:
+            self._notify('append', self._records(slice(start, stop)))
+        return self._row_id[start:stop].copy()
+
+    def update_rows(self, row_ids, changes):
+        """Set columns of several records to one value each, in place and in one update.
+
+        `changes` maps column names other than Serial_No to the new value
+        (a datetime64 for Date). The records keep their row ids and their
+        place in the log; the row ids are returned. Raises KeyError,
+        changing nothing, if a row id is not a live record.
+        """
+        slots = self._live_slots(row_ids)
+        records = self._records(slots)
+        self._overwrite(slots, {column: np.full(len(slots), value, dtype=records[column].dtype)
+                                for column, value in changes.items()})
+        return self._row_id[slots].copy()
+
+    def update_serials(self, frame):
+        """Overwrite the live records with the frame's Serial_Nos with its other columns, in place.
+
+        Replays journaled update_rows() calls. Raises KeyError if a serial
+        is not in the store.
+        """
+        index = self._serial_index
+        slots = np.array([index[serial_no] for serial_no in frame['Serial_No'].tolist()], dtype=np.int64)
+        self._overwrite(slots, {column: frame[column].to_numpy() for column in COLUMNS[1:] if column in frame})
+
+    def _overwrite(self, slots, values):
+        """Write new column values into live slots and tell listeners.
+
+        Changed columns are copied first, so frames handed out earlier keep
+        their values. Listeners see the old records deleted and the new
+        ones appended, both marked with 'in_place': True.
+        """
+        old = self._records(slots)
+        for column, column_values in values.items():
+            name = _COLUMN_ARRAYS[column]
+            target = getattr(self, name).copy()
+            if column in CATEGORICAL:
+                codes, labels = pd.factorize(pd.Series(column_values, dtype=object))
+                lookup = np.array([self._code(column, str(label)) for label in labels] + [-1], dtype=np.int32)
+                target[slots] = lookup[codes]
+            elif column == 'Date':
+                target[slots] = date_array(column_values)
+            else:
+                target[slots] = column_values
+            setattr(self, name, target)
+        self.generation += 1
+        self.version += 1
+        if self._listeners:
+            new = self._records(slots)
+            old['in_place'] = new['in_place'] = True
+            self._notify('delete', old)
+            self._notify('append', new)
+
+    def delete_serial(self, serial_no):
+        """Delete the record with the given Serial_No and return it (see records())."""
+        slot = self._serial_index.pop(int(serial_no))
+        record = self._records(slice(slot, slot + 1))
+        self._alive[slot] = False
+        self._dead += 1
+        self.version += 1
+        self._notify('delete', record)
+        if self._dead * 2 > self._size:
+            self.compact()
+        return record
+
+    def delete_row(self, row_id):
+        """Delete the record with the given row id and return it (see records())."""
+        return self.delete_serial(self._serial[self._slot(row_id)])
+
+    def delete_rows(self, row_ids):
+        """Delete the records with the given row ids in one update and return them (see records()).
+
+        Raises KeyError, deleting nothing, if a row id is not a live record.
+        """
+        slots = self._live_slots(row_ids)
+        records = self._records(slots)
+        if not len(slots):
+            return records
+        index = self._serial_index
+        for serial_no in records['Serial_No'].tolist():
+            del index[serial_no]
+        self._alive[slots] = False
+        self._dead += len(slots)
+        self.version += 1
+        self._notify('delete', records)
+        if self._dead * 2 > self._size:
+            self.compact()
+        return records
+
+    def _live_slots(self, row_ids):
+        """Slots of distinct live row ids, in ascending order, found by binary search."""
+        row_ids = np.unique(np.asarray(row_ids, dtype=np.int64))
+        slots = self.slots(row_ids)
+        found = slots < self._size
+        found[found] = (self._row_id[slots[found]] == row_ids[found]) & self._alive[slots[found]]
+        if not found.all():
+            raise KeyError(f"No record with row id {row_ids[~found][0]}.")
+        return slots
+
+    def _slot(self, row_id):
+        # Row ids increase with the slot, so a binary search finds them
+        slot = int(np.searchsorted(self._row_id[:self._size], int(row_id)))
+        if slot >= self._size or self._row_id[slot] != int(row_id) or not self._alive[slot]:
+            raise KeyError(f"No record with row id {row_id}.")
+        return slot
+
+    def clear(self):
+        """Remove every record. Fresh arrays keep earlier frames intact."""
+        self._size = 0
+        self._dead = 0
+        self._index = {}
+        self._allocate(1024)
+        self.generation += 1
+        self.version += 1
+        self._notify('clear', None)
+
+    def compact(self):
+        """Drop deleted slots. Frames handed out earlier keep their old arrays."""
+        live = self._alive[:self._size]
+        for name in self._ARRAYS:
+            setattr(self, name, getattr(self, name)[:self._size][live].copy())
+        self._size = len(self._serial)
+        self._dead = 0
+        self._index = None
+        self._adopted = False
+        if self._size == 0:
+            self._allocate(1024)
+        self.generation += 1
+
+    def adopt(self, arrays, categories):
+        """Replace every record with existing column arrays, without copying them.
+
+        `arrays` maps each column to a numpy array (category codes for
+        Day/Exercise_Split), e.g. memory-mapped from disk; `categories` maps
+        Day/Exercise_Split to their labels. The store never writes into
+        adopted arrays (the first append copies them into growable ones), so
+        read-only maps are fine.
+        """
+        self.clear()
+        size = len(arrays['Serial_No'])
+        for column, name in _COLUMN_ARRAYS.items():
+            setattr(self, name, arrays[column])
+        self._row_id = np.arange(self._next_row_id, self._next_row_id + size)
+        self._alive = np.ones(size, dtype=bool)
+        self._adopted = True
+        for column in CATEGORICAL:
+            self._categories[column] = list(categories[column])
+            self._category_codes[column] = {label: code for code, label in enumerate(categories[column])}
+        self._size = size
+        self._next_row_id += size
+        self._index = None
+        self.version += 1
+        if self._listeners:
+            self._notify('append', self._records(slice(0, size)))
+
+    def view(self):
+        """Read-only copy of the store as it is now, e.g. to search on another thread.
+
+        The copy shares the column arrays, which the store never writes in
+        place below its size (appends go past it; updates, clears and
+        compactions swap in new arrays), and copies the live flags and the
+        labels, so it keeps its records whatever happens to the store. Its
+        row ids and stamp are the store's at the time.
+        """
+        view = copy.copy(self)
+        for name in self._ARRAYS:
+            setattr(view, name, getattr(self, name)[:self._size])
+        view._alive = view._alive.copy()
+        view._categories = {column: list(labels) for column, labels in self._categories.items()}
+        view._category_codes = {column: dict(codes) for column, codes in self._category_codes.items()}
+        view._index = None
+        view._adopted = True  # Should it be written to, it copies the shared arrays first
+        view._listeners = []
+        return view
+
+    def export_columns(self):
+        """Raw live column arrays (category codes for Day/Exercise_Split) and the category labels."""
+        arrays = {column: self.raw(column) for column in COLUMNS}
+        if self._dead:
+            live = self.alive()
+            arrays = {column: values[live] for column, values in arrays.items()}
+        return arrays, {column: list(self._categories[column]) for column in CATEGORICAL}
+
+    # ---------------- Listeners ---------------- #
+
+    def subscribe(self, listener):
+        """Call listener(event, records) after every mutation.
+
+        `event` is 'append', 'delete' or 'clear'; `records` holds the affected
+        records as returned by records() (None for 'clear'). An in-place
+        update is a 'delete' of the old records followed by an 'append' of
+        the new ones, with the same row ids and 'in_place' set in both.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, event, records):
+        for listener in self._listeners:
+            listener(event, records)
+
+    def _records(self, slots):
+        records = {'row_id': self._row_id[slots]}
+        for column, name in _COLUMN_ARRAYS.items():
+            values = getattr(self, name)[slots]
+            if column in CATEGORICAL:
+                labels = np.array(self._categories[column] + [None], dtype=object)
+                values = labels[values]  # Code -1 picks the trailing None
+            records[column] = values
+        return records
+
+    def records(self):
+        """Live records as a dict of column name (plus 'row_id') -> numpy array."""
+        return self._records(np.flatnonzero(self.alive()))
+
+    # ---------------- Slot access ---------------- #
+
+    @property
+    def stamp(self):
+        """(generation, version); changes whenever the records or their slots do."""
+        return self.generation, self.version
+
+    @property
+    def size(self):
+        """Number of slots in use, deleted ones included."""
+        return self._size
+
+    def raw(self, column, start=0):
+        """View of a column's raw slot values (category codes for Day/Exercise_Split)."""
+        return getattr(self, _COLUMN_ARRAYS[column])[start:self._size]
+
+    def alive(self):
+        """View of the per-slot live flags."""
+        return self._alive[:self._size]
+
+    def row_ids(self):
+        """View of the per-slot row ids, which increase with the slot."""
+        return self._row_id[:self._size]
+
+    def slots(self, row_ids):
+        """Slots of existing row ids, found by binary search."""
+        return np.searchsorted(self._row_id[:self._size], row_ids)
+
+    def categories(self, column):
+        """Labels of a categorical column, indexed by code."""
+        return self._categories[column]
+
+    def select(self, slot_mask):
+        """Rows of frame() whose slots are set in a boolean mask over all slots."""
+        frame = self.frame()
+        return frame[slot_mask[self.alive()]]
+
+    # ---------------- Export ---------------- #
+
+    def frame(self):
+        """DataFrame of the live records, indexed by row id.
+
+        With no pending deletes the numeric columns are views on the store's
+        arrays rather than copies. The frame is cached until the next mutation.
+        """
+        if self._frame_version == self.version:
+            return self._frame
+
+        size = self._size
+        columns = {column: getattr(self, name)[:size] for column, name in _COLUMN_ARRAYS.items()}
+        row_ids = self._row_id[:size]
+        if self._dead:
+            live = self._alive[:size]
+            columns = {name: values[live] for name, values in columns.items()}
+            row_ids = row_ids[live]
+        self._frame = self._build_frame(columns, row_ids)
+        self._frame_version = self.version
+        return self._frame
+
+    def take(self, row_ids):
+        """DataFrame like frame() with only the given (live) row ids, in that order.
+
+        Costs O(k log n) for k rows, without building the whole frame.
+        """
+        slots = self.slots(row_ids)
+        columns = {column: getattr(self, name)[slots] for column, name in _COLUMN_ARRAYS.items()}
+        return self._build_frame(columns, self._row_id[slots])
+
+    def _build_frame(self, columns, row_ids):
+        for column in CATEGORICAL:
+            columns[column] = pd.Categorical.from_codes(columns[column], self._categories[column])
+        return pd.DataFrame(columns, index=pd.Index(row_ids, copy=False), columns=COLUMNS, copy=False)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build a store from a DataFrame holding at least the store's columns."""
+        store = cls(capacity=max(1024, len(frame)))
+        store.extend(frame)
+        return store
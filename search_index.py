@@ -0,0 +1,179 @@
+import re
+
+import numpy as np
+
+from record_store import CATEGORICAL
+
+NUMERIC = ('Serial_No', 'Weight (kg)', 'Diet (Calories)')
+
+# Field names accepted in `field:value`, `field:lo-hi` and `field>value` terms
+FIELDS = {
+    'serial': 'Serial_No', 'sn': 'Serial_No', 'no': 'Serial_No',
+    'day': 'Day',
+    'weight': 'Weight (kg)', 'w': 'Weight (kg)', 'kg': 'Weight (kg)',
+    'split': 'Exercise_Split', 'exercise': 'Exercise_Split',
+    'diet': 'Diet (Calories)', 'cal': 'Diet (Calories)', 'cals': 'Diet (Calories)',
+    'calories': 'Diet (Calories)', 'kcal': 'Diet (Calories)',
+}
+
+_NUMBER = r'-?\d+(?:\.\d+)?'
+_RANGE_TERM = re.compile(rf'^([a-z]+):({_NUMBER})-({_NUMBER})$')
+_COMPARE_TERM = re.compile(rf'^([a-z]+)(<=|>=|<|>|=|:)({_NUMBER})$')
+_FIELD_TERM = re.compile(r'^([a-z]+):(.+)$')
+
+GRAM = 3
+
+
+def _grams(text):
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class _LabelGramIndex:
+    """Trigram index over the distinct labels of one categorical column."""
+
+    def __init__(self):
+        self.lowered = []  # Lowercase label per category code
+        self.postings = {}  # Trigram -> codes of the labels containing it
+
+    def add(self, label):
+        code = len(self.lowered)
+        lowered = label.lower()
+        self.lowered.append(lowered)
+        for gram in _grams(lowered):
+            self.postings.setdefault(gram, set()).add(code)
+
+    def matching_codes(self, term):
+        """Codes of every label containing `term`."""
+        if len(term) < GRAM:
+            candidates = range(len(self.lowered))
+        else:
+            candidates = set.intersection(*(self.postings.get(gram, set()) for gram in _grams(term)))
+        return [code for code in candidates if term in self.lowered[code]]
+
+
+class _TextColumn:
+    """Byte-string copy of a numeric column, grown geometrically."""
+
+    def __init__(self):
+        self.values = np.empty(1024, dtype='S1')
+        self.size = 0
+
+    def extend(self, raw):
+        text = raw.astype('S')
+        if len(text):
+            text = text.astype(f'S{max(1, int(np.char.str_len(text).max()))}')
+        if text.dtype.itemsize > self.values.dtype.itemsize:
+            self.values = self.values.astype(text.dtype)
+        needed = self.size + len(text)
+        if needed > len(self.values):
+            grown = np.empty(max(needed, 2 * len(self.values)), dtype=self.values.dtype)
+            grown[:self.size] = self.values[:self.size]
+            self.values = grown
+        self.values[self.size:needed] = text
+        self.size = needed
+
+    def contains(self, term, size):
+        """Mask over the first `size` slots."""
+        return np.char.find(self.values[:size], term.encode()) >= 0
+
+
+class FitnessSearchIndex:
+    """Search over a FitnessRecordStore.
+
+    Queries are whitespace-separated terms that must all match:
+
+    - plain text, matched case-insensitively as a substring of any column
+    - ``field:text``, e.g. ``day:mon`` or ``split:legs``
+    - ``field:lo-hi`` numeric ranges, e.g. ``weight:70-72``
+    - ``field>value`` comparisons (``<``, ``<=``, ``>``, ``>=``, ``=``), e.g. ``cal>3000``
+
+    Day and Exercise_Split are matched through a trigram index over their
+    distinct labels and then resolved to rows with a vectorized lookup on the
+    category codes. Numeric columns keep a precomputed string copy for text
+    matching. The index follows the store incrementally: new slots and new
+    labels are indexed on the next query, and it is only rebuilt when the
+    store renumbers its slots or replaces its labels. `store` may be pointed
+    at successive views of one store (see FitnessRecordStore.view) to search
+    off the thread that changes it.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._generation = None
+        self._labels = {}
+        self._text = {}
+
+    def _sync(self):
+        """Index whatever was added to the store since the last query."""
+        store = self.store
+        if self._generation != store.generation:
+            self._generation = store.generation
+            # adopt() also brings new category lists, so the labels are indexed afresh too
+            self._text = {column: _TextColumn() for column in NUMERIC}
+            self._labels = {column: _LabelGramIndex() for column in CATEGORICAL}
+
+        for column, labels in self._labels.items():
+            for label in store.categories(column)[len(labels.lowered):]:
+                labels.add(label)
+        for column, text in self._text.items():
+            if store.size > text.size:
+                text.extend(store.raw(column, text.size))
+
+    def warm(self):
+        """Index the store now instead of on the first query, e.g. while a splash screen is up."""
+        self._sync()
+
+    # ---------------- Queries ---------------- #
+
+    def search(self, query):
+        """Rows of the store's frame matching `query`. Raises ValueError on a bad term."""
+        self._sync()
+        mask = self.store.alive().copy()
+        for term in query.lower().split():
+            mask &= self._match(term)
+        return self.store.select(mask)
+
+    def _match(self, term):
+        """Boolean mask over all slots for a single query term."""
+        match = _RANGE_TERM.match(term)
+        if match and match.group(1) in FIELDS:
+            low, high = sorted((float(match.group(2)), float(match.group(3))))
+            values = self._numeric(FIELDS[match.group(1)])
+            return (values >= low) & (values <= high)
+
+        match = _COMPARE_TERM.match(term)
+        if match and match.group(1) in FIELDS and not (match.group(2) == ':' and FIELDS[match.group(1)] in CATEGORICAL):
+            values = self._numeric(FIELDS[match.group(1)])
+            operator, number = match.group(2), float(match.group(3))
+            if operator == '<':
+                return values < number
+            if operator == '<=':
+                return values <= number
+            if operator == '>':
+                return values > number
+            if operator == '>=':
+                return values >= number
+            return values == number
+
+        match = _FIELD_TERM.match(term)
+        if match and match.group(1) in FIELDS:
+            return self._text_match(FIELDS[match.group(1)], match.group(2))
+
+        mask = np.zeros(self.store.size, dtype=bool)
+        for column in CATEGORICAL + NUMERIC:
+            mask |= self._text_match(column, term)
+        return mask
+
+    def _numeric(self, column):
+        if column not in NUMERIC:
+            raise ValueError(f"{column} is not a numeric field.")
+        return self.store.raw(column)
+
+    def _text_match(self, column, term):
+        if column in CATEGORICAL:
+            codes = self._labels[column].matching_codes(term)
+            return np.isin(self.store.raw(column), codes)
+        if any(char.isalpha() and char not in 'enaif' for char in term):
+            # Letters other than those of "nan", "inf" and exponents never occur in a number
+            return np.zeros(self.store.size, dtype=bool)
+        return self._text[column].contains(term, self.store.size)
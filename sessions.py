@@ -0,0 +1,110 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+SESSION_DIR = '.fitapp'
+SESSION_TTL = 14 * 24 * 3600  # Seconds a login is remembered
+
+
+def _path(*parts):
+    return os.path.join(SESSION_DIR, *parts)
+
+
+def _write_private(path, data):
+    """Write a file readable only by the current user, replacing it atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as handle:
+        handle.write(data)
+    os.replace(temporary, path)
+
+
+def _secret():
+    """Signing key for session tokens, created on first use and kept on this machine."""
+    path = _path('session.key')
+    try:
+        with open(path, 'rb') as handle:
+            return handle.read()
+    except FileNotFoundError:
+        key = os.urandom(32)
+        _write_private(path, key)
+        return key
+
+
+def _sign(body):
+    return hmac.new(_secret(), body.encode('ascii'), hashlib.sha256).hexdigest()
+
+
+# ---------------- Tokens ---------------- #
+
+def issue_token(user_id, username, ttl=SESSION_TTL):
+    """Signed token "<payload>.<signature>" naming the user and when it expires."""
+    payload = {'user_id': user_id, 'username': username, 'expires': int(time.time()) + ttl}
+    body = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+    return f"{body}.{_sign(body)}"
+
+
+def read_token(token):
+    """The payload of a valid, unexpired token, else None."""
+    body, _, signature = token.partition('.')
+    if not hmac.compare_digest(_sign(body), signature):
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(body.encode('ascii')))
+    except ValueError:
+        return None
+    return payload if payload.get('expires', 0) > time.time() else None
+
+
+# ---------------- Saved session ---------------- #
+
+def start_session(user_id, username):
+    """Remember a successful login: save its token and cache the user's profile."""
+    token = issue_token(user_id, username)
+    _write_private(_path('session'), token.encode('ascii'))
+    save_profile(user_id, {'user_id': user_id, 'username': username, 'last_login': int(time.time())})
+    return token
+
+
+def resume_session():
+    """The saved session's payload ({'user_id', 'username', 'expires'}) if it is still valid, else None.
+
+    Checked locally, without a database round-trip.
+    """
+    try:
+        with open(_path('session'), 'rb') as handle:
+            token = handle.read().decode('ascii').strip()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+    return read_token(token)
+
+
+def end_session():
+    """Forget the saved session (log out). Cached user data is kept."""
+    try:
+        os.remove(_path('session'))
+    except FileNotFoundError:
+        pass
+
+
+# ---------------- Per-user cache ---------------- #
+
+def user_dir(user_id):
+    """Directory holding a user's cached profile and data."""
+    return _path('users', str(int(user_id)))
+
+
+def save_profile(user_id, profile):
+    _write_private(os.path.join(user_dir(user_id), 'profile.json'), json.dumps(profile).encode('utf-8'))
+
+
+def load_profile(user_id):
+    try:
+        with open(os.path.join(user_dir(user_id), 'profile.json')) as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return None
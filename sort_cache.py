@@ -0,0 +1,147 @@
+import numpy as np
+
+from record_store import CATEGORICAL
+
+
+class _ColumnOrder:
+    """One column's slots sorted by value, as of `size` slots and `labels` categories."""
+
+    def __init__(self, slots, keys, size, labels):
+        self.slots = slots  # Slots in sorted order, deleted ones included
+        self.keys = keys    # Sort keys of those slots, ascending with missing values last
+        self.size = size
+        self.labels = labels
+        self.ranks = None   # Dense rank per slot, for multi-column sorts
+        self.missing_rank = None
+
+    def missing(self):
+        """Position in `keys` where the missing values (NaN, NaT, no label) start."""
+        if self.labels is not None:
+            return int(np.searchsorted(self.keys, self.labels))
+        kind = self.keys.dtype.kind
+        if kind not in 'fM':
+            return len(self.keys)
+        return int(np.searchsorted(self.keys, np.datetime64('NaT') if kind == 'M' else np.nan))
+
+
+class SortCache:
+    """Sort orders of the store's columns, kept up to date across changes.
+
+    A column's order is computed with one argsort on first use and then
+    maintained: slots appended since are sorted on their own and merged in
+    by binary search, and deleted slots are dropped when an order is read.
+    Re-sorting after an add or delete therefore costs O(n) instead of
+    O(n log n). A compaction, a clear, or a new Day/Exercise_Split label
+    (which shifts the label order) starts the column afresh. Day and
+    Exercise_Split sort by label; missing values sort last either way.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._generation = store.generation
+        self._columns = {}
+        self._multi = None  # (keys, generation, version, slots) of the last multi-column sort
+
+    def _keys(self, column, start=0):
+        """Sortable values of the slots from `start` on."""
+        values = self.store.raw(column, start)
+        if column not in CATEGORICAL:
+            return values
+        labels = self.store.categories(column)
+        # Code -> position of its label in sorted order; the trailing entry ranks missing (-1) codes last
+        ranks = np.empty(len(labels) + 1, dtype=np.int64)
+        ranks[np.argsort(np.array(labels, dtype=object), kind='stable')] = np.arange(len(labels))
+        ranks[-1] = len(labels)
+        return ranks[values]
+
+    def _column(self, column):
+        store = self.store
+        if self._generation != store.generation:
+            self._generation = store.generation
+            self._columns = {}
+        labels = len(store.categories(column)) if column in CATEGORICAL else None
+        cached = self._columns.get(column)
+        if cached is None or cached.labels != labels:
+            keys = self._keys(column)
+            slots = np.argsort(keys, kind='stable')
+            cached = self._columns[column] = _ColumnOrder(slots, keys[slots], store.size, labels)
+        elif cached.size < store.size:
+            keys = self._keys(column, cached.size)
+            slots = np.argsort(keys, kind='stable')
+            keys = keys[slots]
+            # Newer slots go after equal keys, which keeps the order stable
+            at = np.searchsorted(cached.keys, keys, side='right')
+            cached.slots = np.insert(cached.slots, at, slots + cached.size)
+            cached.keys = np.insert(cached.keys, at, keys)
+            cached.size = store.size
+            cached.ranks = None
+        return cached
+
+    def _ranks(self, column, ascending):
+        """Per-slot ranks of `column` for np.lexsort: equal values share one, missing values rank last."""
+        cached = self._column(column)
+        if cached.ranks is None:
+            missing = cached.missing()
+            keys = cached.keys[:missing]
+            dense = np.empty(len(cached.keys), dtype=np.int64)
+            dense[:missing] = np.cumsum(np.concatenate(([False], keys[1:] != keys[:-1])))[:missing]
+            dense[missing:] = missing  # Above every rank of a present value
+            cached.ranks = np.empty(len(dense), dtype=np.int64)
+            cached.ranks[cached.slots] = dense
+            cached.missing_rank = missing
+        if ascending:
+            return cached.ranks
+        return np.where(cached.ranks == cached.missing_rank, cached.ranks, -cached.ranks)
+
+    def _sorted_slots(self, keys):
+        """Live slots ordered by (column, ascending) keys."""
+        store = self.store
+        alive = store.alive()
+        if len(keys) == 1:
+            column, ascending = keys[0]
+            cached = self._column(column)
+            slots = cached.slots
+            if not ascending:
+                missing = cached.missing()
+                slots = np.concatenate((slots[:missing][::-1], slots[missing:]))
+            return slots[alive[slots]] if len(store) < store.size else slots
+
+        keys = tuple(keys)
+        if self._multi is not None and self._multi[:3] == (keys, store.generation, store.version):
+            return self._multi[3]
+        live = np.flatnonzero(alive)
+        # np.lexsort takes the most significant key last
+        slots = live[np.lexsort([self._ranks(column, ascending)[live] for column, ascending in reversed(keys)])]
+        self._multi = (keys, store.generation, store.version, slots)
+        return slots
+
+    def order(self, keys, row_ids=None):
+        """Positions that sort the store's frame() by `keys`, a list of (column, ascending) pairs.
+
+        The first pair is the primary key. With `row_ids` (ascending, e.g.
+        the index of a search result) the positions index those rows
+        instead; returns None if they are not all live records.
+        """
+        store = self.store
+        slots = self._sorted_slots(keys)
+        alive = store.alive()
+        if len(store) < store.size:
+            # Slot -> position among the live slots, i.e. in frame()
+            positions = (np.cumsum(alive) - 1)[slots]
+        else:
+            positions = slots
+        if row_ids is None:
+            return positions
+
+        row_ids = np.asarray(row_ids)
+        live_row_ids = store.row_ids()[alive]
+        if len(row_ids) == len(live_row_ids) and np.array_equal(row_ids, live_row_ids):
+            return positions
+        found = np.searchsorted(live_row_ids, row_ids)
+        if len(row_ids) and (found[-1] >= len(live_row_ids) or not np.array_equal(live_row_ids[found], row_ids)):
+            return None
+        # Frame position -> position in the subset, -1 for rows outside it
+        subset = np.full(len(live_row_ids), -1, dtype=np.int64)
+        subset[found] = np.arange(len(row_ids))
+        positions = subset[positions]
+        return positions[positions >= 0]
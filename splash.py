@@ -1,55 +1,94 @@
+import importlib
+import threading
 import tkinter as tk
+from tkinter import ttk
+
+from db_setup import get_pool, wait_for_database
+from sessions import resume_session
+from tasks import TaskScheduler
+
+# Imported in the background: fit pulls in pandas and matplotlib
+PRELOAD_MODULES = ('fit',)
+
+
+# ---------------- Preloading (background threads) ---------------- #
+
+def import_modules():
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+
+
+def connect_database():
+    """Wait for the database bootstrap and open the first pooled connection."""
+    try:
+        wait_for_database()
+        with get_pool().connection():
+            pass
+    except Exception as e:
+        # The login reports the problem again when it needs the database
+        print(f"Could not connect to the database yet: {e}")
 
 
 class SplashApp:
+    """Splash screen that hands over to the login, or a remembered user's app, once drawn.
+
+    The database connection and the heavy imports are prepared on
+    background threads behind whichever window comes next, so the login
+    never waits for them and resuming a session never waits for the
+    database. Only the main window's own module has to be imported before
+    a remembered user's app can open; it loads its data itself.
+    """
+
     def __init__(self, root, navigation_manager):
-        # Initialize splash screen
-        self.splash = tk.Tk()
-        self.setup_splash()
+        self.root = root
         self.navigation_manager = navigation_manager
-        
-        self.run()
+        self.tasks = TaskScheduler(self.root)
+        self.setup_splash()
+
+        # Start once the splash has been drawn
+        self.root.after_idle(self.run)
 
     def setup_splash(self):
         """Setup the splash screen window."""
-        self.splash.title("Splash Screen")
-        self.splash.geometry("400x300")
-        self.splash.overrideredirect(True)  # Remove window decorations
+        self.root.title("Splash Screen")
+        self.root.geometry("400x300")
+        self.root.overrideredirect(True)  # Remove window decorations
+
+        self.frame = tk.Frame(self.root)
+        self.frame.pack(expand=True, fill="both")
 
         # Add a label or logo
         tk.Label(
-            self.splash, 
-            text="Loading App...", 
-            font=("Arial", 20), 
+            self.frame,
+            text="Loading App...",
+            font=("Arial", 20),
             fg="blue"
         ).pack(expand=True)
 
-        # Show splash screen for a few seconds, then launch the main app
-        self.splash.after(3000, self.navigation_manager.show_login())  # Show splash for 3 seconds
-
-    def launch_main_app(self):
-        """Close splash screen and launch the main application."""
-        self.splash.destroy() 
-        self.main_app()
-
-    def main_app(self):
-        """Setup and launch the main application window."""
-        main_window = tk.Tk()
-        main_window.title("Main App")
-        main_window.geometry("600x400")
-        tk.Label(
-            main_window, 
-            text="Welcome to the Main Application!", 
-            font=("Arial", 18)
-        ).pack(pady=50)
-        main_window.mainloop()
+        self.progress = ttk.Progressbar(self.frame, mode="indeterminate", length=300)
+        self.progress.pack(pady=5)
+        self.status = tk.Label(self.frame, text="Starting...", font=("Arial", 10))
+        self.status.pack(pady=(0, 30))
 
     def run(self):
-        """Run the splash screen."""
-        self.splash.mainloop()
+        """Start preloading behind the next window, and show it as soon as it can be."""
+        threading.Thread(target=connect_database, name="preload-database", daemon=True).start()
+        if resume_session() is None:
+            threading.Thread(target=import_modules, name="preload-modules", daemon=True).start()
+            self.launch_main_app()
+            return
+        self.status.config(text="Opening your fitness log...")
+        self.progress.start()
+        self.tasks.submit("Modules", lambda task: import_modules(),
+                          on_done=self.launch_main_app, on_error=self.launch_main_app)
 
+    def launch_main_app(self, result=None):
+        """Close splash screen and launch the login window, or the app for a remembered login.
 
-# # Run the application
-# if __name__ == "__main__":
-#     app = SplashApp()
-#     app.run()
+        An import error is reported again, with its traceback, when the app is opened.
+        """
+        self.tasks.shutdown()
+        self.progress.stop()
+        self.frame.destroy()
+        self.root.overrideredirect(False)
+        self.navigation_manager.resume_or_login()
@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from csv_io import export_csv, import_csv
+from record_store import NO_DATE, FitnessRecordStore
+
+DEFAULT_PATH = 'fitness_data'  # Memory-mapped column directory
+LEGACY_CSV = 'fitness.csv'
+
+# Column -> file name inside a memory-mapped data directory
+COLUMN_FILES = {
+    'Serial_No': 'serial_no.npy',
+    'Date': 'date.npy',
+    'Day': 'day.npy',
+    'Weight (kg)': 'weight.npy',
+    'Exercise_Split': 'split.npy',
+    'Diet (Calories)': 'calories.npy',
+}
+CATEGORIES_FILE = 'categories.json'
+
+
+class CsvStorage:
+    """Plain CSV text, streamed in chunks (see csv_io)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self, store, progress=None):
+        import_csv(self.path, store, progress=progress)
+
+    def save(self, store, progress=None):
+        export_csv(store.frame(), self.path, progress=progress)
+
+
+class MemoryMappedStorage:
+    """A directory with one .npy file per column, opened with np.load(mmap_mode='r').
+
+    Loading maps the files and hands them to the store as its column arrays,
+    so opening takes the same time whatever the size of the log, and the OS
+    only reads the pages of the columns and rows a view actually touches.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        self._recover()
+        return os.path.exists(os.path.join(self.path, CATEGORIES_FILE))
+
+    def _recover(self):
+        """Put a directory back in place if a save was interrupted between its two renames."""
+        if os.path.exists(self.path):
+            return
+        # categories.json is written last, so a .tmp directory that has it is complete
+        for candidate in (f"{self.path}.tmp", f"{self.path}.old"):
+            if os.path.exists(os.path.join(candidate, CATEGORIES_FILE)):
+                os.rename(candidate, self.path)
+                return
+
+    def load(self, store, progress=None):
+        if not self.exists():
+            raise FileNotFoundError(self.path)
+        with open(os.path.join(self.path, CATEGORIES_FILE)) as handle:
+            categories = json.load(handle)
+        arrays = {column: np.load(os.path.join(self.path, name), mmap_mode='r')
+                  for column, name in COLUMN_FILES.items() if os.path.exists(os.path.join(self.path, name))}
+        if 'Date' not in arrays:
+            # Saved before the log had dates
+            arrays['Date'] = np.full(len(arrays['Serial_No']), NO_DATE)
+        store.adopt(arrays, categories)
+        if progress is not None:
+            progress(len(store), 1.0)
+
+    def save(self, store, progress=None):
+        """Write the columns to a fresh directory, then swap it in place of the old one."""
+        arrays, categories = store.export_columns()
+        fresh, stale = f"{self.path}.tmp", f"{self.path}.old"
+        shutil.rmtree(fresh, ignore_errors=True)
+        os.makedirs(fresh)
+        for done, (column, name) in enumerate(COLUMN_FILES.items(), 1):
+            np.save(os.path.join(fresh, name), np.ascontiguousarray(arrays[column]))
+            if progress is not None:
+                progress(len(store), done / (len(COLUMN_FILES) + 1))
+        with open(os.path.join(fresh, CATEGORIES_FILE), 'w') as handle:
+            json.dump(categories, handle)
+
+        # The old files may still be mapped by the store, so they are moved aside rather than overwritten
+        shutil.rmtree(stale, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.rename(self.path, stale)
+        os.rename(fresh, self.path)
+        shutil.rmtree(stale, ignore_errors=True)
+        if progress is not None:
+            progress(len(store), 1.0)
+
+
+class ArrowStorage:
+    """Feather or Parquet file through pandas/pyarrow (an optional dependency)."""
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _read(self):
+        try:
+            if self.file_format == 'feather':
+                return pd.read_feather(self.path, memory_map=True)
+            return pd.read_parquet(self.path)
+        except ImportError as e:
+            raise ImportError(f"pyarrow is required for .{self.file_format} storage: {e}") from None
+
+    def load(self, store, progress=None):
+        store.clear()
+        store.extend(self._read())
+        if progress is not None:
+            progress(len(store), 1.0)
+
+    def save(self, store, progress=None):
+        frame = store.frame().reset_index(drop=True)
+        temporary = f"{self.path}.tmp"
+        try:
+            if self.file_format == 'feather':
+                frame.to_feather(temporary)
+            else:
+                frame.to_parquet(temporary, index=False)
+        except ImportError as e:
+            raise ImportError(f"pyarrow is required for .{self.file_format} storage: {e}") from None
+        os.replace(temporary, self.path)
+        if progress is not None:
+            progress(len(store), 1.0)
+
+
+def snapshot(store):
+    """Copy of a store's live records, safe to save from another thread while the store changes."""
+    arrays, categories = store.export_columns()
+    copy = FitnessRecordStore()
+    copy.adopt({column: np.array(values) for column, values in arrays.items()}, categories)
+    return copy
+
+
+def open_storage(path):
+    """Pick the storage backend for a path by its extension (a directory is memory-mapped)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return CsvStorage(path)
+    if extension in ('.feather', '.arrow'):
+        return ArrowStorage(path, 'feather')
+    if extension in ('.parquet', '.pq'):
+        return ArrowStorage(path, 'parquet')
+    return MemoryMappedStorage(path)
+
+
+def migrate_csv(storage, store, csv_path=LEGACY_CSV, progress=None):
+    """Fill a new binary storage from an existing fitness.csv; returns True if it did.
+
+    The CSV file itself is left untouched.
+    """
+    if isinstance(storage, CsvStorage) or storage.exists() or not os.path.exists(csv_path):
+        return False
+    import_csv(csv_path, store, progress=progress)
+    storage.save(store)
+    return True
@@ -0,0 +1,186 @@
+import queue
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+WORKERS = 2
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task (by Task.progress/check) once it has been cancelled."""
+
+
+class Task:
+    """One background job. The function it runs receives the Task as its first argument."""
+
+    def __init__(self, scheduler, name, fn, args, key, on_done, on_error, on_progress):
+        self.scheduler = scheduler
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self._cancelled = threading.Event()
+        self._finished = False  # Set by the worker once fn has returned
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Ask the task to stop; a no-op once its function has returned, as its work is done."""
+        with self._lock:
+            if not self._finished:
+                self._cancelled.set()
+
+    def _finish(self):
+        with self._lock:
+            self._finished = True
+
+    def check(self):
+        """Raise TaskCancelled if the task was cancelled; call it between steps of long work."""
+        if self.cancelled:
+            raise TaskCancelled(self.name)
+
+    def progress(self, rows, fraction, partial=None):
+        """Report progress to the Tk thread (same signature as csv_io's progress callbacks).
+
+        A `partial` result, e.g. a view of the records read so far, is
+        passed on to on_progress as a third argument.
+        """
+        self.check()
+        payload = (rows, fraction) if partial is None else (rows, fraction, partial)
+        self.scheduler._events.put(('progress', self, payload))
+
+
+def _call(callback, *args):
+    """Run a Tk-thread callback, printing rather than propagating its errors so the other tasks still finish."""
+    try:
+        callback(*args)
+    except Exception:
+        traceback.print_exc()
+
+
+class TaskScheduler:
+    """Runs slow work on a thread pool and hands the results back to the Tk thread.
+
+    Workers never touch widgets: results, errors and progress reports go
+    through a queue that is polled with after(), and the task's on_done /
+    on_error / on_progress callbacks run on the Tk thread. Tasks that share a
+    `key` (e.g. 'store' for everything that replaces the record store's
+    contents) run one at a time in submission order, and serialize() holds
+    back a Tk-thread action until the key's queued tasks are done.
+    """
+
+    def __init__(self, widget, workers=WORKERS, poll=20):
+        self.widget = widget
+        self.poll = poll  # Queue polling interval in ms
+        self.running = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fitness-task")
+        self._events = queue.Queue()
+        self._busy = {}     # key -> Task holding it
+        self._waiting = {}  # key -> deque of Tasks and Tk-thread actions
+        self._polling = None
+
+    # ---------------- Tk thread ---------------- #
+
+    def submit(self, name, fn, *args, key=None, on_done=None, on_error=None, on_progress=None):
+        """Run fn(task, *args) on a worker and return the Task."""
+        task = Task(self, name, fn, args, key, on_done, on_error, on_progress)
+        if key is not None and key in self._busy:
+            self._waiting.setdefault(key, deque()).append(task)
+        else:
+            self._start(task)
+        return task
+
+    def serialize(self, key, action):
+        """Call action() now if no task holds `key`, otherwise once they have all finished."""
+        if key in self._busy:
+            self._waiting.setdefault(key, deque()).append(action)
+        else:
+            action()
+
+    def busy(self, key=None):
+        return key in self._busy if key is not None else bool(self.running)
+
+    def cancel_all(self):
+        """Cancel the running and queued tasks.
+
+        A task stops at its next check() and its on_error receives
+        TaskCancelled; one whose function returns anyway is reported to
+        on_done, since its work (e.g. a committed save) has happened.
+        """
+        for task in self.running:
+            task.cancel()
+        for waiting in self._waiting.values():
+            for item in waiting:
+                if isinstance(item, Task):
+                    item.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+
+    def _start(self, task):
+        if task.key is not None:
+            self._busy[task.key] = task
+        self.running.append(task)
+        self._executor.submit(self._run, task)
+        if self._polling is None:
+            self._polling = self.widget.after(self.poll, self._deliver)
+
+    def _deliver(self):
+        self._polling = None
+        progress = {}  # Only the latest report per task is shown
+        finished = []
+        while True:
+            try:
+                kind, task, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                progress[task] = payload
+            else:
+                progress.pop(task, None)
+                finished.append((kind, task, payload))
+
+        try:
+            for task, payload in progress.items():
+                if task.on_progress is not None and not task.cancelled:
+                    _call(task.on_progress, *payload)
+            for kind, task, payload in finished:
+                self.running.remove(task)
+                callback = task.on_done if kind == 'done' else task.on_error
+                if callback is not None:
+                    _call(callback, payload)
+                self._release(task)
+        finally:
+            if self.running and self._polling is None:
+                self._polling = self.widget.after(self.poll, self._deliver)
+
+    def _release(self, task):
+        if task.key is None:
+            return
+        del self._busy[task.key]
+        waiting = self._waiting.get(task.key)
+        while waiting:
+            item = waiting.popleft()
+            if isinstance(item, Task):
+                self._start(item)
+                return
+            _call(item)
+
+    # ---------------- Worker threads ---------------- #
+
+    def _run(self, task):
+        try:
+            task.check()
+            result = task.fn(task, *task.args)
+            task._finish()
+            self._events.put(('done', task, result))
+        except Exception as e:
+            self._events.put(('error', task, e))
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from record_store import to_date
+
+DAY = np.timedelta64(1, 'D')
+PERIODS = ('day', 'week', 'month', 'year')
+
+
+def period_start(dates, period):
+    """First day of the day/week/month/year each datetime64 date falls in (weeks start on Monday)."""
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}; use one of {', '.join(PERIODS)}.")
+    days = dates.astype('datetime64[D]')
+    if period == 'week':
+        # Day 0 of numpy's calendar, 1970-01-01, was a Thursday
+        starts = days - (days.astype(np.int64) + 3) % 7
+    else:
+        starts = days.astype(f'datetime64[{period[0].upper()}]')
+    return starts.astype('datetime64[s]')
+
+
+class FitnessTimeSeries:
+    """The store's dated records in date order, for date-range queries and resampling.
+
+    The dates of the live records are kept sorted alongside their row ids,
+    so a date range is found with two binary searches and read without
+    scanning the log. The order is maintained from the store's change
+    events and brought up to date on the next query: entries logged in date
+    order are appended, others merged in, and deletes filtered out in one
+    vectorized pass. Records without a date are left out.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._dates = np.empty(0, dtype='datetime64[s]')
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._added = []    # (dates, row ids) appended since the last query
+        self._deleted = []  # Row ids deleted since the last query
+        live = store.alive()
+        if live.any():
+            self._added.append((store.raw('Date')[live], store.row_ids()[live]))
+        store.subscribe(self._on_change)
+
+    def _on_change(self, event, records):
+        if event == 'clear':
+            self._dates = self._dates[:0]
+            self._row_ids = self._row_ids[:0]
+            self._added, self._deleted = [], []
+        elif event == 'append':
+            self._added.append((records['Date'], records['row_id']))
+        else:
+            # Deletes apply to the sorted arrays before the pending appends are merged
+            # in, so pending ones are dropped here; an in-place update re-adds its row ids
+            deleted = records['row_id']
+            self._deleted.append(deleted)
+            pending = []
+            for dates, row_ids in self._added:
+                keep = ~np.isin(row_ids, deleted)
+                pending.append((dates[keep], row_ids[keep]))
+            self._added = pending
+
+    def _sync(self):
+        if self._deleted:
+            keep = ~np.isin(self._row_ids, np.concatenate(self._deleted))
+            self._deleted = []
+            self._dates, self._row_ids = self._dates[keep], self._row_ids[keep]
+        if self._added:
+            dates = np.concatenate([dates for dates, _ in self._added])
+            row_ids = np.concatenate([row_ids for _, row_ids in self._added])
+            self._added = []
+            dated = ~np.isnat(dates)
+            dates, row_ids = dates[dated], row_ids[dated]
+            in_order = len(dates) < 2 or bool(np.all(dates[1:] >= dates[:-1]))
+            if in_order and (not len(self._dates) or not len(dates) or dates[0] >= self._dates[-1]):
+                self._dates = np.concatenate((self._dates, dates))
+                self._row_ids = np.concatenate((self._row_ids, row_ids))
+            else:
+                # Both runs are mostly sorted already, which the stable sort exploits
+                dates = np.concatenate((self._dates, dates))
+                order = np.argsort(dates, kind='stable')
+                self._dates = dates[order]
+                self._row_ids = np.concatenate((self._row_ids, row_ids))[order]
+
+    def __len__(self):
+        """Number of dated records."""
+        self._sync()
+        return len(self._dates)
+
+    def span(self):
+        """(first, last) date as datetime64, or None if nothing is dated."""
+        self._sync()
+        return (self._dates[0], self._dates[-1]) if len(self._dates) else None
+
+    def _range(self, start, end):
+        """Positions [low, high) of the dates within start..end, both inclusive and optional."""
+        self._sync()
+        low = 0 if start is None else int(np.searchsorted(self._dates, to_date(start)))
+        high = len(self._dates) if end is None else int(np.searchsorted(self._dates, to_date(end) + DAY))
+        return low, max(low, high)
+
+    def row_ids(self, start=None, end=None):
+        """Row ids of the records dated start..end (inclusive; None leaves that side open), in date order."""
+        low, high = self._range(start, end)
+        return self._row_ids[low:high]
+
+    def between(self, start=None, end=None):
+        """Records dated start..end as a DataFrame like the store's frame(), in date order."""
+        return self.store.take(self.row_ids(start, end))
+
+    def series(self, start=None, end=None):
+        """Weight and calories of the records dated start..end, indexed by their dates."""
+        low, high = self._range(start, end)
+        slots = self.store.slots(self._row_ids[low:high])
+        return pd.DataFrame({column: self.store.raw(column)[slots] for column in ('Weight (kg)', 'Diet (Calories)')},
+                            index=pd.DatetimeIndex(self._dates[low:high], name='Date'))
+
+    def resample(self, period='week', start=None, end=None):
+        """Per-period summary of the records dated start..end, indexed by each period's first day.
+
+        Columns: Entries, mean Weight (kg) with Weight Min/Max, mean Diet
+        (Calories) and Calories Total. Periods without entries are left out.
+        """
+        series = self.series(start, end)
+        starts = pd.DatetimeIndex(period_start(series.index.to_numpy(), period), name=period.capitalize())
+        return series.groupby(starts, sort=False).agg(**{
+            'Entries': ('Weight (kg)', 'size'),
+            'Weight (kg)': ('Weight (kg)', 'mean'),
+            'Weight Min': ('Weight (kg)', 'min'),
+            'Weight Max': ('Weight (kg)', 'max'),
+            'Diet (Calories)': ('Diet (Calories)', 'mean'),
+            'Calories Total': ('Diet (Calories)', 'sum'),
+        })
@@ -0,0 +1,224 @@
+from tkinter import ttk
+
+import numpy as np
+import pandas as pd
+
+ARROWS = {True: ' \u25b2', False: ' \u25bc'}  # Heading marks of ascending/descending sort keys
+
+
+class VirtualTable:
+    """A ttk.Treeview that only materializes the rows visible in its viewport."""
+
+    def __init__(self, parent, columns, height=10, overscan=5, sorter=None):
+        self.columns = list(columns)
+        self.height = height
+        self.overscan = overscan
+        self.sorter = sorter if sorter is not None else sort_order
+        self.data = None
+        self.sort_keys = []  # (column, ascending) pairs, primary key first
+        self.order = None    # Positions of self.data in display order; None shows it as is
+        self.first = 0   # Position of the top visible row in self.data
+        self.start = 0   # Position of the first materialized row in self.data
+        self.items = []  # Materialized Treeview item ids (stable row ids), in display order
+        self.rendered = {}  # Treeview item id -> values currently shown for it
+        self.selected = set()  # Selected item ids, including rows scrolled out of the tree
+
+        self.tree = ttk.Treeview(parent, columns=self.columns, show='headings', height=height)
+        for col in self.columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=150)
+
+        # The scrollbar tracks the whole dataset, not the handful of rows in the tree
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+
+        self.tree.bind("<Button-1>", self._on_click, add="+")
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.tree.bind("<Prior>", lambda event: self.scroll_rows(-self.height))
+        self.tree.bind("<Next>", lambda event: self.scroll_rows(self.height))
+
+    # ---------------- Data ---------------- #
+
+    def set_data(self, data):
+        """Show a new DataFrame, keeping the scroll position and sort order where possible."""
+        self.data = data
+        self.order = self.sorter(data, self.sort_keys) if self.sort_keys else None
+        self.refresh()
+
+    def row_count(self):
+        """Number of rows in the underlying data."""
+        return 0 if self.data is None else len(self.data)
+
+    def refresh(self):
+        """Re-render the visible window (plus overscan) from the underlying data."""
+        total = self.row_count()
+        self.first = max(0, min(self.first, total - self.height))
+        self.start = max(0, self.first - self.overscan)
+        stop = min(total, self.first + self.height + self.overscan)
+
+        rows = []
+        if stop > self.start:
+            rows_shown = slice(self.start, stop) if self.order is None else self.order[self.start:stop]
+            window = self.data.iloc[rows_shown]
+            row_ids = [str(row_id) for row_id in window.index]
+            rows = list(zip(row_ids, _displayed(window[self.columns]).itertuples(index=False, name=None)))
+        self.apply_rows(rows)
+
+        if self.items:
+            self.tree.yview_moveto((self.first - self.start) / len(self.items))
+        self._update_scrollbar(total)
+
+    def apply_rows(self, rows):
+        """Diff (row_id, values) pairs against the Treeview and apply only what changed."""
+        wanted = {row_id for row_id, _ in rows}
+        for row_id in self.items:
+            if row_id not in wanted:
+                self.tree.delete(row_id)
+                del self.rendered[row_id]
+        self.items = [row_id for row_id in self.items if row_id in wanted]
+
+        for position, (row_id, values) in enumerate(rows):
+            if row_id not in self.rendered:
+                self.tree.insert("", position, iid=row_id, values=values)
+                self.items.insert(position, row_id)
+                self.rendered[row_id] = values
+                if row_id in self.selected:
+                    self.tree.selection_add(row_id)
+                continue
+            if self.rendered[row_id] != values:
+                self.tree.item(row_id, values=values)
+                self.rendered[row_id] = values
+            if self.items[position] != row_id:
+                self.tree.move(row_id, "", position)
+                self.items.remove(row_id)
+                self.items.insert(position, row_id)
+
+    # ---------------- Selection ---------------- #
+
+    def selection(self):
+        """Item ids of the selected rows of the data, whether or not they are scrolled into view."""
+        self.selected = self._present(self.selected)
+        return sorted(self.selected)
+
+    def _present(self, item_ids):
+        """The item ids that are still rows of the data, e.g. not deleted or filtered out by a search."""
+        if self.data is None or not item_ids:
+            return set()
+        index = self.data.index
+        if index.dtype.kind not in 'iu':
+            return set(item_ids)
+        row_ids = np.array([int(item_id) for item_id in item_ids], dtype=np.int64)
+        return {str(row_id) for row_id in row_ids[np.isin(row_ids, index.to_numpy())]}
+
+    def _on_select(self, event):
+        # The tree only knows the selection within the window; keep the rest as it was
+        self.selected = (self.selected - set(self.items)) | set(self.tree.selection())
+
+    # ---------------- Sorting ---------------- #
+
+    def sort_by(self, column, add=False):
+        """Sort by a column, or with add=True by it after the current keys.
+
+        Sorting again by the only (or, with add, an existing) key flips its
+        direction. Only the visible window is read in the new order; the
+        data itself is not reordered or copied.
+        """
+        keys = dict(self.sort_keys)
+        if add:
+            keys[column] = not keys.get(column, False)
+        else:
+            keys = {column: not keys.get(column, False) if len(keys) == 1 else True}
+        self.sort_keys = list(keys.items())
+        self._update_headings()
+        self.set_data(self.data)
+
+    def clear_sort(self):
+        """Show the rows in the data's own order again."""
+        self.sort_keys = []
+        self._update_headings()
+        self.set_data(self.data)
+
+    def _update_headings(self):
+        marks = {column: ARROWS[ascending] + (str(number) if len(self.sort_keys) > 1 else '')
+                 for number, (column, ascending) in enumerate(self.sort_keys, 1)}
+        for col in self.columns:
+            self.tree.heading(col, text=col + marks.get(col, ''))
+
+    def _on_click(self, event):
+        """Sort on a heading click; Shift-click adds the column as a further key.
+
+        A plain click on a row also drops the selected rows out of view,
+        which the Treeview's own selection does not cover.
+        """
+        region = self.tree.identify_region(event.x, event.y)
+        if region in ("cell", "tree") and not event.state & 0x5:  # Neither Shift nor Control held
+            self.selected = set()
+        if region != "heading":
+            return None
+        column = self.tree.identify_column(event.x)  # "#1", "#2", ...
+        if not column:
+            return None
+        self.sort_by(self.columns[int(column[1:]) - 1], add=bool(event.state & 0x1))
+        return "break"
+
+    # ---------------- Scrolling ---------------- #
+
+    def yview(self, *args):
+        """Scrollbar command: page rows in as the scrollbar moves."""
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * self.row_count())
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self.refresh()
+
+    def scroll_rows(self, count):
+        """Scroll the viewport by a number of rows."""
+        self.first += count
+        self.refresh()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_tree_scroll(self, first, last):
+        """Follow the Treeview when it scrolls itself, e.g. on arrow-key navigation."""
+        if not self.items:
+            return
+        top = self.start + int(round(float(first) * len(self.items)))
+        if top != self.first:
+            self.first = top
+            self.refresh()
+
+    def _update_scrollbar(self, total):
+        if total <= self.height:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self.height) / total)
+
+
+def sort_order(data, keys):
+    """Positions that sort a DataFrame by (column, ascending) keys, with missing values last."""
+    if data is None or not len(data):
+        return None
+    ranks = []
+    for column, ascending in reversed(keys):  # np.lexsort takes the most significant key last
+        values = data[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)  # By label, not by the order the categories were added in
+        codes, _ = pd.factorize(values, sort=True)
+        missing = codes < 0
+        codes = codes if ascending else -codes
+        ranks.append(np.where(missing, len(data), codes))
+    return np.lexsort(ranks)
+
+
+def _displayed(window):
+    """The window with dates shown as YYYY-MM-DD and missing ones left blank."""
+    for column in window.columns:
+        if window[column].dtype.kind == 'M':
+            window = window.assign(**{column: window[column].dt.strftime('%Y-%m-%d').fillna('')})
+    return window